@@ -23,6 +23,106 @@ function fetchWithTimeout(url, options = {}) {
     });
 }
 
+// Upload a payment proof in resumable chunks (see app/resumable.py) and return its upload id.
+// A failed chunk is retried from the offset the server reports, and the upload location is kept
+// in localStorage so submitting again, even after a reload, carries on where it stopped.
+const UPLOAD_CHUNK_SIZE = 512 * 1024;
+
+async function uploadPaymentProof(file, onProgress) {
+    const fingerprint = `proof-upload:${file.name}:${file.size}:${file.lastModified}`;
+    const encode = value => btoa(unescape(encodeURIComponent(value)));
+    let location = localStorage.getItem(fingerprint);
+    let offset = null;
+    
+    if (location) {
+        const head = await fetchWithTimeout(location, { method: 'HEAD', cache: 'no-store' }).catch(() => null);
+        if (head && head.ok) {
+            offset = parseInt(head.headers.get('Upload-Offset'), 10);
+        }
+    }
+    if (offset === null) {
+        const response = await fetchWithTimeout('/api/uploads', {
+            method: 'POST',
+            headers: {
+                'Tus-Resumable': '1.0.0',
+                'Upload-Length': String(file.size),
+                'Upload-Metadata': `filename ${encode(file.name)},filetype ${encode(file.type || 'application/octet-stream')}`
+            }
+        });
+        if (response.status !== 201) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || 'Could not start the payment proof upload');
+        }
+        location = response.headers.get('Location');
+        localStorage.setItem(fingerprint, location);
+        offset = 0;
+    }
+    
+    let failures = 0;
+    while (offset < file.size) {
+        onProgress && onProgress(Math.floor(offset * 100 / file.size));
+        try {
+            const response = await fetchWithTimeout(location, {
+                method: 'PATCH',
+                headers: {
+                    'Tus-Resumable': '1.0.0',
+                    'Upload-Offset': String(offset),
+                    'Content-Type': 'application/offset+octet-stream'
+                },
+                body: file.slice(offset, offset + UPLOAD_CHUNK_SIZE),
+                timeout: 60000
+            });
+            if (response.status === 204) {
+                offset = parseInt(response.headers.get('Upload-Offset'), 10);
+                failures = 0;
+                continue;
+            }
+            if (response.status === 404) {
+                // Expired on the server - start over
+                localStorage.removeItem(fingerprint);
+                return uploadPaymentProof(file, onProgress);
+            }
+            if (response.status !== 409 && response.status !== 429 && response.status !== 503) {
+                const data = await response.json().catch(() => ({}));
+                throw new Error(data.error || 'Payment proof upload failed');
+            }
+        } catch (error) {
+            if (++failures > 5) {
+                throw error;
+            }
+            console.warn('Chunk upload failed, resuming:', error);
+        }
+        // Ask the server how much it has and continue from there
+        await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+        const head = await fetchWithTimeout(location, { method: 'HEAD', cache: 'no-store' }).catch(() => null);
+        if (head && head.ok) {
+            offset = parseInt(head.headers.get('Upload-Offset'), 10);
+        }
+    }
+    return location.split('/').pop();
+}
+
+// Poll a queued registration ticket until the server has accepted or rejected it
+async function waitForRegistration(statusUrl, maxWaitMs = 60000) {
+    const deadline = Date.now() + maxWaitMs;
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        try {
+            const response = await fetchWithTimeout(statusUrl, { cache: 'no-store' });
+            if (response.status === 429 || response.status === 503) {
+                continue; // Busy - keep waiting
+            }
+            const data = await response.json();
+            if (!response.ok || data.status !== 'queued') {
+                return data;
+            }
+        } catch (error) {
+            console.warn('Registration status check failed, retrying:', error);
+        }
+    }
+    throw new Error('Registration is still being processed (timeout). Please check with the organisers before registering again.');
+}
+
 // Dynamically determine API base URL based on current host
 // This works for localhost, port forwarding, dev tunnels, Render, and deployed environments
 function getApiBaseUrl() {
@@ -65,9 +165,63 @@ function getApiBaseUrl() {
 const API_BASE_URL = getApiBaseUrl();
 
 // Registration form integration
+// Ask /api/availability whether a team name or email is taken; null if the check could not be made
+async function checkAvailability(params) {
+    try {
+        const response = await fetchWithTimeout(`/api/availability?${new URLSearchParams(params)}`, { timeout: 5000 });
+        if (!response.ok) {
+            return null; // Busy or rate limited - the server checks again on submit
+        }
+        return await response.json();
+    } catch (error) {
+        return null;
+    }
+}
+
+function showAvailabilityError(input, errorElement, message) {
+    if (!errorElement) return;
+    errorElement.textContent = message || '';
+    errorElement.style.display = message ? 'block' : 'none';
+    input.style.borderBottomColor = message ? '#c62828' : '';
+}
+
+// Warn about taken team names while typing and taken emails when leaving the field
+function setupAvailabilityChecks(form) {
+    const teamNameInput = document.getElementById('teamNameInput');
+    if (teamNameInput) {
+        let timer = null;
+        teamNameInput.addEventListener('input', () => {
+            clearTimeout(timer);
+            const value = teamNameInput.value.trim();
+            const errorElement = document.getElementById('teamNameError');
+            showAvailabilityError(teamNameInput, errorElement, '');
+            if (!value) return;
+            timer = setTimeout(async () => {
+                const data = await checkAvailability({ team_name: value });
+                if (data && data.team_name === false && teamNameInput.value.trim() === value) {
+                    showAvailabilityError(teamNameInput, errorElement, 'This team name is already taken');
+                }
+            }, 400);
+        });
+    }
+    
+    // Member blocks are rendered on the fly, so listen on the form
+    form.addEventListener('focusout', async (e) => {
+        const input = e.target;
+        if (!input.classList || !input.classList.contains('member-email') || !input.checkValidity()) return;
+        const value = input.value.trim();
+        const data = await checkAvailability({ email: value });
+        if (data && data.emails && data.emails[value] === false && input.value.trim() === value) {
+            showAvailabilityError(input, input.parentElement.querySelector('.member-email-error'),
+                'This email is already registered with another team');
+        }
+    });
+}
+
 function setupRegistrationForm() {
     const form = document.getElementById('registrationForm');
     if (!form) return;
+    setupAvailabilityChecks(form);
     
     form.addEventListener('submit', async function(e) {
         e.preventDefault();
@@ -198,10 +352,6 @@ function setupRegistrationForm() {
         formData.append('team_size', teamSize);
         formData.append('utr_transaction_id', utrTransactionId);
         
-        if (paymentProofFile) {
-            formData.append('payment_proof', paymentProofFile);
-        }
-        
         // Add member data (including college name for each member)
         members.forEach((member, index) => {
             formData.append(`member_${index + 1}_name`, member.name);
@@ -217,17 +367,27 @@ function setupRegistrationForm() {
         submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Registering...';
         
         try {
+            // Upload the payment proof on its own, resumably, and refer to it by id
+            if (paymentProofFile) {
+                const uploadId = await uploadPaymentProof(paymentProofFile, percent => {
+                    submitBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Uploading proof... ${percent}%`;
+                });
+                formData.append('payment_proof_upload_id', uploadId);
+                submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Registering...';
+            }
+            
             // Use relative URL for same-origin requests (works on Render)
             const apiUrl = '/api/register';
             console.log('Registering team via:', apiUrl); // Debug log
             const response = await fetchWithTimeout(apiUrl, {
                 method: 'POST',
                 body: formData,
-                timeout: 30000 // 30 second timeout for file upload
+                timeout: 30000
             });
             
             // Parse response - only show ticket if we get confirmed success from server
             let data;
+            let registered = false;
             
             try {
                 const text = await response.text();
@@ -242,9 +402,17 @@ function setupRegistrationForm() {
                 return;
             }
             
+            // The server queues the registration (202) and saves it moments later
+            if (response.status === 202 && data.success === true && data.status_url) {
+                submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Confirming...';
+                data = await waitForRegistration(data.status_url);
+                registered = data.status === 'accepted';
+            } else {
+                registered = response.status === 201 && data.success === true;
+            }
+            
             // Only show ticket if we have explicit success confirmation from server
-            // Status must be 201 (Created) AND data.success must be true
-            if (response.status === 201 && data.success === true) {
+            if (registered) {
                 // Data is confirmed stored in database - show success ticket
                 const ticketOverlay = document.getElementById('ticket-overlay');
                 const ticketTeamName = document.getElementById('ticketTeamName');
@@ -1,8 +1,7 @@
-from flask import Flask
-from app import create_app
-
-app = create_app()
+from wsgi import app
+from app.cli import init_db
 
 if __name__ == '__main__':
+    with app.app_context():
+        init_db()
     app.run(debug=True, host='0.0.0.0', port=5000)
-
@@ -1,11 +1,21 @@
 from flask import Flask, send_from_directory, send_file, render_template
 from app.config import Config
-from app.models import db, Sponsor
-from app.routes import register_blueprints
+from app.models import db
+from app.routes import register_blueprints, sponsor_list
+from app import restore, storage, instrumentation, metrics, profiling, log, sync, conditional, cache, compression, json_provider, cli, admission, resumable, transactions
+from app.delivery import deliver_file
 from pathlib import Path
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 def create_app():
+    """Build the application without touching the database or the filesystem.
+
+    Tables and schema upgrades are created once with `flask init-db`, so this
+    is cheap and safe to call in a gunicorn --preload master.
+    """
     # Get project root directory
     BASE_DIR = Path(__file__).parent.parent
     
@@ -13,13 +23,37 @@ def create_app():
     # This prevents static file serving from intercepting API routes
     app = Flask(__name__, template_folder=str(BASE_DIR))
     app.config.from_object(Config)
+    json_provider.init_app(app)
+    
+    # Compression's after_request must run after every other hook, so register it first
+    compression.init_app(app)
+    
+    # Structured logging first, so everything below logs through it
+    log.init_app(app)
     
     # Initialize database
     db.init_app(app)
+    # Savepoints always nest in a real transaction on SQLite
+    transactions.init_app(app)
+    # flask init-db: directories, tables and schema upgrades
+    cli.init_app(app)
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    # Row-version stamping on flush
+    sync.init_app(app)
+    # Per-table versions for ETag/Last-Modified on read endpoints
+    conditional.init_app(app)
+    # Settings/sponsors/statistics/ticket cache, invalidated on commit
+    cache.init_app(app)
+    
+    # Reload the engine in every worker after a database restore
+    restore.init_app(app)
+    storage.init_app(app)
+    resumable.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    # After metrics, so rejected requests are still counted
+    admission.init_app(app)
+    profiling.init_app(app)
     
     # Serve HTML files - register these BEFORE the catch-all route
     @app.route('/')
@@ -27,31 +61,22 @@ def create_app():
     def index():
         # Get sponsors from database
         try:
-            sponsors = Sponsor.query.order_by(Sponsor.display_order, Sponsor.created_at).all()
-            sponsors_data = [sponsor.to_dict() for sponsor in sponsors]
-            print(f"[INDEX ROUTE] Found {len(sponsors_data)} sponsors to display")  # Debug log
-            for s in sponsors_data:
-                print(f"  - {s.get('name')}: {s.get('logo_path')}")
-        except Exception as e:
-            import traceback
-            print(f"[INDEX ROUTE] Error fetching sponsors: {e}")
-            print(traceback.format_exc())
+            sponsors_data = sponsor_list()
+        except Exception:
+            logger.exception("Error fetching sponsors for index")
             sponsors_data = []
         
         # Render main.html as template with sponsors data
         try:
-            print(f"[INDEX ROUTE] Rendering template with {len(sponsors_data)} sponsors")
-            rendered = render_template('main.html', sponsors=sponsors_data)
-            print(f"[INDEX ROUTE] Template rendered successfully, length: {len(rendered)}")
-            return rendered
-        except Exception as e:
-            import traceback
-            print(f"[INDEX ROUTE] Error rendering template: {e}")
-            print(traceback.format_exc())
+            if __debug__:
+                # Stripped when running with python -O / PYTHONOPTIMIZE=1
+                logger.debug("Rendering main.html with %d sponsors", len(sponsors_data))
+            return render_template('main.html', sponsors=sponsors_data)
+        except Exception:
+            logger.exception("Error rendering main.html template")
             # Fallback: try to serve the file directly if template rendering fails
             main_path = BASE_DIR / 'main.html'
             if main_path.exists():
-                print("[INDEX ROUTE] Falling back to send_file")
                 return send_file(str(main_path))
             return {'error': 'Template rendering failed'}, 500
     
@@ -79,14 +104,15 @@ def create_app():
             return index()
         
         file_path = BASE_DIR / filename
+        # Security check: ensure file is within the project directory
+        try:
+            file_path.resolve().relative_to(BASE_DIR.resolve())
+        except ValueError:
+            return {'error': 'Invalid file path'}, 403
         # Serve files if they exist
         if file_path.exists() and file_path.is_file():
-            return send_file(str(file_path))
+            return deliver_file(file_path)
         return {'error': 'File not found'}, 404
     
     return app
 
-# Expose app instance for gunicorn compatibility
-# This allows 'gunicorn app:app' to work
-app = create_app()
-
@@ -0,0 +1,336 @@
+"""
+Admission control for /api requests.
+
+Each request is classified by endpoint into a priority and a rate-limit
+bucket:
+
+- high: registration, payment-proof uploads and admin writes; never shed
+- normal: logins, team writes and admin reads; shed only by a route limit
+- low: public reads such as toggle polling, team browsing and sponsors
+
+Per-client token buckets (RATE_LIMITS) answer 429 with Retry-After once a
+client has used up its bucket. In-flight requests are counted per endpoint
+across all workers. A low-priority request gets 503 with Retry-After when
+the total reaches ADMISSION_SHED_AT, which keeps the remaining workers and
+threads free for registrations and admin actions. An endpoint at its
+ADMISSION_ROUTE_LIMITS limit (e.g. the review export) sheds every priority.
+
+State lives in a WAL-mode SQLite file next to the database, shared by every
+worker on the host ('sqlite', default), or in the process ('local'). If the
+store cannot be reached the request is admitted; admission control never
+turns into a new way to fail.
+"""
+import fcntl
+import logging
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from flask import g, jsonify, request, session
+
+from app.cache import sidecar_path
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW = 'high', 'normal', 'low'
+
+# endpoint -> (priority, rate-limit bucket); None means no per-client limit.
+# Other endpoints: admin writes are high, other writes and admin reads normal,
+# public reads low, all in the 'default' bucket.
+ROUTE_CLASSES = {
+    'api.register_team': (HIGH, None),
+    'api.registration_status': (NORMAL, 'poll'),
+    'api.create_upload': (HIGH, None),
+    'api.upload_offset': (HIGH, None),
+    'api.upload_chunk': (HIGH, None),
+    'api.login': (NORMAL, 'login'),
+    'api.get_login_toggle': (LOW, 'poll'),
+    'api.get_registration_toggle': (LOW, 'poll'),
+    'api.get_teams_toggle': (LOW, 'poll'),
+    'api.get_teams': (LOW, 'browse'),
+    'api.get_team': (LOW, 'browse'),
+    'api.get_public_sponsors': (LOW, 'browse'),
+    'api.check_availability': (LOW, 'availability'),
+}
+
+# Rows of requests whose worker died are ignored and removed after this long
+STALE_AFTER = 300
+PRUNE_EVERY = 1000
+
+
+def parse_rate_limits(spec):
+    """'poll=120/60,login=20/60' -> {'poll': (capacity, tokens per second)}; 'off' -> {}"""
+    limits = {}
+    if spec.strip().lower() == 'off':
+        return limits
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        count, _, seconds = rate.partition('/')
+        limits[name.strip()] = (float(count), float(count) / float(seconds or 1))
+    return limits
+
+
+def parse_route_limits(spec):
+    """'api.export_review_marks=2' -> {'api.export_review_marks': 2}; 'off' -> {}"""
+    limits = {}
+    if spec.strip().lower() == 'off':
+        return limits
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        endpoint, _, limit = item.partition('=')
+        limits[endpoint.strip()] = int(limit)
+    return limits
+
+
+class LocalStore:
+    """Admission state for a single process"""
+    name = 'local'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._inflight = {}
+        self._slots = {}
+        self._next_slot = 0
+
+    def acquire(self, route, shed_at, route_limit, bucket_key, capacity, rate, now):
+        with self._lock:
+            total = sum(self._inflight.values())
+            if (shed_at and total >= shed_at) or (route_limit and self._inflight.get(route, 0) >= route_limit):
+                return 'shed', None
+            if bucket_key is not None:
+                tokens, updated_at = self._buckets.get(bucket_key, (capacity, now))
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                if tokens < 1:
+                    self._buckets[bucket_key] = (tokens, now)
+                    return 'limited', (1 - tokens) / rate
+                self._buckets[bucket_key] = (tokens - 1, now)
+            self._next_slot += 1
+            self._slots[self._next_slot] = route
+            self._inflight[route] = self._inflight.get(route, 0) + 1
+            return 'admitted', self._next_slot
+
+    def release(self, slot):
+        with self._lock:
+            route = self._slots.pop(slot, None)
+            if route is not None:
+                self._inflight[route] -= 1
+
+    def inflight(self):
+        with self._lock:
+            return {route: count for route, count in self._inflight.items() if count}
+
+
+class SQLiteStore:
+    """Admission state in a SQLite file shared by all worker processes on the host"""
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._ops = 0
+
+    def _conn(self):
+        # One connection per thread, reopened in forked workers
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Losing this state in a crash is harmless; skip the fsyncs
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS admission_buckets '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS admission_inflight '
+            '(id INTEGER PRIMARY KEY, route TEXT NOT NULL, started_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_admission_inflight_started ON admission_inflight (started_at)')
+        self._local.conn = conn
+        self._local.lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _write_lock(self):
+        """Queue writers on a kernel lock, which wakes them at once, instead of
+        SQLite's busy handler, which sleeps for a millisecond or more"""
+        conn = self._conn()
+        fcntl.flock(self._local.lock_fd, fcntl.LOCK_EX)
+        try:
+            yield conn
+        finally:
+            fcntl.flock(self._local.lock_fd, fcntl.LOCK_UN)
+
+    def acquire(self, route, shed_at, route_limit, bucket_key, capacity, rate, now):
+        with self._write_lock() as conn:
+            return self._acquire(conn, route, shed_at, route_limit, bucket_key, capacity, rate, now)
+
+    def _acquire(self, conn, route, shed_at, route_limit, bucket_key, capacity, rate, now):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            total, on_route = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(route = ?), 0) FROM admission_inflight WHERE started_at > ?',
+                (route, now - STALE_AFTER)
+            ).fetchone()
+            if (shed_at and total >= shed_at) or (route_limit and on_route >= route_limit):
+                conn.execute('COMMIT')
+                return 'shed', None
+
+            if bucket_key is not None:
+                row = conn.execute(
+                    'SELECT tokens, updated_at FROM admission_buckets WHERE key = ?', (bucket_key,)
+                ).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                admitted = tokens >= 1
+                conn.execute(
+                    'INSERT OR REPLACE INTO admission_buckets (key, tokens, updated_at) VALUES (?, ?, ?)',
+                    (bucket_key, tokens - 1 if admitted else tokens, now)
+                )
+                if not admitted:
+                    conn.execute('COMMIT')
+                    return 'limited', (1 - tokens) / rate
+
+            slot = conn.execute(
+                'INSERT INTO admission_inflight (route, started_at) VALUES (?, ?)', (route, now)
+            ).lastrowid
+            self._ops += 1
+            if self._ops % PRUNE_EVERY == 0:
+                self._prune(conn, now)
+            conn.execute('COMMIT')
+            return 'admitted', slot
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _prune(self, conn, now):
+        # Full buckets carry no state, and stale slots belong to dead workers
+        conn.execute('DELETE FROM admission_buckets WHERE updated_at < ?', (now - 3600,))
+        conn.execute('DELETE FROM admission_inflight WHERE started_at <= ?', (now - STALE_AFTER,))
+
+    def release(self, slot):
+        with self._write_lock() as conn:
+            conn.execute('DELETE FROM admission_inflight WHERE id = ?', (slot,))
+
+    def inflight(self):
+        rows = self._conn().execute(
+            'SELECT route, COUNT(*) FROM admission_inflight WHERE started_at > ? GROUP BY route',
+            (time.time() - STALE_AFTER,)
+        ).fetchall()
+        return dict(rows)
+
+
+def create_store(app):
+    if Config.ADMISSION_BACKEND == 'local':
+        return LocalStore()
+    path = Path(Config.ADMISSION_PATH) if Config.ADMISSION_PATH else sidecar_path(app, 'admission')
+    return SQLiteStore(path)
+
+
+_store = None
+_rate_limits = {}
+_route_limits = {}
+
+
+def classify():
+    """(priority, rate-limit bucket) of the current request"""
+    if request.endpoint in ROUTE_CLASSES:
+        return ROUTE_CLASSES[request.endpoint]
+    admin = request.path.startswith('/api/admin/')
+    if request.method in ('GET', 'HEAD'):
+        return (NORMAL if admin else LOW), 'default'
+    return (HIGH if admin else NORMAL), 'default'
+
+
+def client_key():
+    """Client address, taken from X-Forwarded-For when behind TRUSTED_PROXY_COUNT proxies"""
+    if Config.TRUSTED_PROXY_COUNT:
+        route = request.access_route
+        return route[-min(Config.TRUSTED_PROXY_COUNT, len(route))]
+    return request.remote_addr or 'unknown'
+
+
+def _reject(status, message, retry_after):
+    response = jsonify({'success': False, 'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _admit():
+    if request.blueprint != 'api' or request.method == 'OPTIONS':
+        return None
+    priority, bucket = classify()
+    is_admin = session.get('is_admin')
+    if is_admin and priority == LOW:
+        # The admin console polls the same toggles; keep it responsive
+        priority = NORMAL
+    bucket_key = capacity = rate = None
+    # Signed-in admins are never rate limited
+    if bucket is not None and bucket in _rate_limits and not is_admin:
+        capacity, rate = _rate_limits[bucket]
+        bucket_key = f'{bucket}:{client_key()}'
+    shed_at = Config.ADMISSION_SHED_AT if priority == LOW else 0
+
+    try:
+        outcome, value = _store.acquire(
+            request.endpoint, shed_at, _route_limits.get(request.endpoint, 0),
+            bucket_key, capacity, rate, time.time()
+        )
+    except sqlite3.Error as e:
+        logger.warning("Admission store unavailable, admitting %s: %s", request.endpoint, e)
+        return None
+
+    if outcome == 'admitted':
+        g._admission_slot = value
+        return None
+    if outcome == 'limited':
+        logger.info("Rate limited %s on %s (%s bucket)", bucket_key, request.endpoint, bucket)
+        return _reject(429, 'Too many requests, please retry shortly', value)
+    # Spread the retries so shed clients do not come back all at once
+    retry_after = Config.ADMISSION_RETRY_AFTER * (1 + random.random())
+    logger.info("Shed %s request to %s", priority, request.endpoint)
+    return _reject(503, 'Server is busy, please retry shortly', retry_after)
+
+
+def _release(exc=None):
+    slot = g.pop('_admission_slot', None)
+    if slot is None:
+        return
+    try:
+        _store.release(slot)
+    except sqlite3.Error as e:
+        # The slot goes stale and stops counting after STALE_AFTER
+        logger.warning("Could not release admission slot %s: %s", slot, e)
+
+
+def stats():
+    """In-flight API requests per endpoint, across all workers for the sqlite store"""
+    inflight = _store.inflight() if _store is not None else {}
+    return {
+        'backend': _store.name if _store is not None else None,
+        'inflight': inflight,
+        'total_inflight': sum(inflight.values()),
+        'shed_at': Config.ADMISSION_SHED_AT,
+        'route_limits': _route_limits,
+    }
+
+
+def init_app(app):
+    global _store, _rate_limits, _route_limits
+    if not Config.ADMISSION_ENABLED:
+        return
+    _store = create_store(app)
+    _rate_limits = parse_rate_limits(Config.RATE_LIMITS)
+    _route_limits = parse_route_limits(Config.ADMISSION_ROUTE_LIMITS)
+    app.before_request(_admit)
+    app.teardown_request(_release)
@@ -0,0 +1,133 @@
+"""
+In-memory index of taken team names and member emails for /api/availability.
+
+Each worker keeps the team name and member emails of every team, plus
+counters for lookups, so checking a name while the user types costs no
+query. The index is loaded once (in the gunicorn master by the when_ready
+hook, so forked workers inherit it) and then kept current from the sync
+counter (app/sync.py): at most every AVAILABILITY_REFRESH_INTERVAL seconds
+it reads the counter, and if it moved, re-reads only the teams whose
+row_version is newer, plus tombstones for teams that were removed. A
+database restore changes the generation and reloads everything.
+
+Names are normalized the way register_team does (collapsed whitespace,
+lower case); emails are matched as entered, after trimming, like
+app/intake.check_unique. The writer's check stays the one that counts, so
+a name taken a moment ago may still show as available.
+"""
+import threading
+import time
+from collections import Counter
+
+from app.config import Config
+from app.models import db, Team, Member, TeamTombstone
+from app.sync import current_version
+from app.restore import read_generation
+
+
+def normalize_name(team_name):
+    return ' '.join((team_name or '').split()).lower()
+
+
+def normalize_email(email):
+    return (email or '').strip()
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._teams = {}  # team id -> (normalized name, emails)
+        self._names = Counter()
+        self._emails = Counter()
+        self._generation = None
+        self._version = 0
+        self._checked_at = 0.0
+
+    def _remove(self, team_id):
+        name, emails = self._teams.pop(team_id, (None, ()))
+        if name is not None:
+            self._names[name] -= 1
+            if self._names[name] <= 0:
+                del self._names[name]
+        for email in emails:
+            self._emails[email] -= 1
+            if self._emails[email] <= 0:
+                del self._emails[email]
+
+    def _add(self, team_id, name, emails):
+        self._teams[team_id] = (name, emails)
+        self._names[name] += 1
+        self._emails.update(emails)
+
+    def _load(self, since):
+        """Apply teams changed after version since; since=None loads all"""
+        teams = db.session.query(Team.id, Team.team_name)
+        members = db.session.query(Member.team_id, Member.email).join(Team, Member.team_id == Team.id)
+        if since is not None:
+            teams = teams.filter(Team.row_version > since)
+            members = members.filter(Team.row_version > since)
+        emails = {}
+        for row in members:
+            emails.setdefault(row.team_id, []).append(normalize_email(row.email))
+        for row in teams:
+            self._remove(row.id)
+            self._add(row.id, normalize_name(row.team_name), tuple(emails.get(row.id, ())))
+        if since is not None:
+            removed = db.session.query(TeamTombstone.team_id).filter(TeamTombstone.row_version > since)
+            for row in removed:
+                self._remove(row.team_id)
+
+    def refresh(self, force=False):
+        """Bring the index up to date if the refresh interval has passed. Needs an app context."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < Config.AVAILABILITY_REFRESH_INTERVAL:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < Config.AVAILABILITY_REFRESH_INTERVAL:
+                return
+            generation = read_generation()
+            # Read the counter first; rows committed after it are picked up next time
+            version = current_version()
+            if generation != self._generation or version < self._version:
+                self._teams.clear()
+                self._names.clear()
+                self._emails.clear()
+                self._load(None)
+            elif version > self._version:
+                self._load(self._version)
+            self._generation = generation
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def name_taken(self, team_name):
+        return normalize_name(team_name) in self._names
+
+    def email_taken(self, email):
+        return normalize_email(email) in self._emails
+
+    def stats(self):
+        return {
+            'teams': len(self._teams),
+            'emails': len(self._emails),
+            'version': self._version,
+            'age_seconds': round(time.monotonic() - self._checked_at, 3) if self._checked_at else None,
+        }
+
+
+index = AvailabilityIndex()
+
+
+def warm():
+    """Load the index; called with the other caches when gunicorn is ready"""
+    index.refresh(force=True)
+
+
+def check(team_name=None, emails=()):
+    """{'team_name': available?, 'emails': {email: available?}} for the given values"""
+    index.refresh()
+    result = {}
+    if team_name is not None:
+        result['team_name'] = not index.name_taken(team_name)
+    if emails:
+        result['emails'] = {email: not index.email_taken(email) for email in emails}
+    return result
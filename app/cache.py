@@ -0,0 +1,416 @@
+"""
+Application cache shared by the settings, sponsors, statistics and ticket paths.
+
+Backends (CACHE_BACKEND):
+
+- 'sqlite' (default): a WAL-mode SQLite file next to the database, shared by
+  every gunicorn worker on the host; oldest entries are evicted first
+- 'local': an in-process LRU, for a single worker or development; other
+  workers only see a change once their entry expires
+- 'redis': CACHE_URL=redis://...; CACHE_URL=fakeredis:// uses fakeredis
+  as a local stand-in
+
+Entries carry tags. Every commit invalidates the tags of what it wrote: the
+table name ('sponsors', 'admin_settings', ...) and 'team:<id>' for team,
+member and login rows, so views never have to invalidate by hand. Values
+are pickled by the shared backends; treat values from the local backend as
+read-only.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from importlib.util import find_spec
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from app.config import Config
+from app.models import db, Team, Member, TeamLogin
+
+logger = logging.getLogger(__name__)
+
+# redis is only imported when CACHE_BACKEND=redis
+REDIS_AVAILABLE = find_spec('redis') is not None
+
+_MISSING = object()
+
+
+class BaseCache:
+    name = 'base'
+
+    def __init__(self, default_ttl=300):
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._counter_lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        value = self._get(key)
+        self._count(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_or_set(self, key, loader, ttl=None, tags=()):
+        """Cached value for key, calling loader() and storing its result on a miss"""
+        value = self._get(key)
+        self._count(value is not _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl=ttl, tags=tags)
+        return value
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None, tags=()):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LocalCache(BaseCache):
+    """In-process LRU with per-entry TTL and a bounded number of entries"""
+    name = 'local'
+
+    def __init__(self, max_entries=2048, default_ttl=300):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None, tags=()):
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires_at, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        return {**super().stats(), 'entries': len(self._entries), 'max_entries': self.max_entries}
+
+
+class SQLiteCache(BaseCache):
+    """Cache in a SQLite file shared by all worker processes on the host"""
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=2048, default_ttl=300):
+        super().__init__(default_ttl)
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _conn(self):
+        # One connection per thread, reopened in forked workers
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_tags '
+            '(tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, key):
+        row = self._conn().execute(
+            'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        if row[1] < time.time():
+            self.delete(key)
+            return _MISSING
+        return pickle.loads(row[0])
+
+    def _delete_keys(self, conn, keys):
+        conn.executemany('DELETE FROM cache_entries WHERE key = ?', [(key,) for key in keys])
+        conn.executemany('DELETE FROM cache_tags WHERE key = ?', [(key,) for key in keys])
+
+    def set(self, key, value, ttl=None, tags=()):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + (ttl or self.default_ttl)
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Re-inserting gives the key a new rowid, so rowid order is insertion order
+            self._delete_keys(conn, [key])
+            conn.execute(
+                'INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, data, expires_at)
+            )
+            conn.executemany('INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+            excess = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0] - self.max_entries
+            if excess > 0:
+                oldest = [row[0] for row in conn.execute(
+                    'SELECT key FROM cache_entries ORDER BY rowid LIMIT ?', (excess,)
+                )]
+                self._delete_keys(conn, oldest)
+                self.evictions += len(oldest)
+
+    def delete(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._delete_keys(conn, [key])
+
+    def invalidate_tags(self, tags):
+        tags = list(tags)
+        if not tags:
+            return
+        conn = self._conn()
+        placeholders = ','.join('?' * len(tags))
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            keys = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT key FROM cache_tags WHERE tag IN ({placeholders})', tags
+            )]
+            self._delete_keys(conn, keys)
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM cache_entries')
+            conn.execute('DELETE FROM cache_tags')
+
+    def stats(self):
+        entries = self._conn().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        return {**super().stats(), 'entries': entries, 'max_entries': self.max_entries, 'path': self.path}
+
+
+class RedisCache(BaseCache):
+    """Cache in Redis; tags are sets of keys, size is bounded by the server's maxmemory"""
+    name = 'redis'
+
+    def __init__(self, client, default_ttl=300, prefix='hogwarts:cache:'):
+        super().__init__(default_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f'{self.prefix}{key}'
+
+    def _tag_key(self, tag):
+        return f'{self.prefix}tag:{tag}'
+
+    def _get(self, key):
+        data = self.client.get(self._key(key))
+        return _MISSING if data is None else pickle.loads(data)
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = ttl or self.default_ttl
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=ttl)
+        # Tag sets do not expire - they are dropped when the tag is invalidated
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+        pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = self.client.smembers(tag_key)
+            pipe = self.client.pipeline()
+            for key in keys:
+                pipe.delete(self._key(key.decode() if isinstance(key, bytes) else key))
+            pipe.delete(tag_key)
+            pipe.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f'{self.prefix}*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self):
+        stats = super().stats()
+        try:
+            # Redis does the evicting; report the server's count
+            stats['evictions'] = self.client.info('stats').get('evicted_keys', 0)
+        except Exception as e:
+            logger.warning("Could not read Redis stats: %s", e)
+        return stats
+
+
+def sidecar_path(app, name):
+    """SQLite file for state shared by the workers, next to the database (<db>-<name>.db)"""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        database = Path(url.database)
+        return database.with_name(f'{database.stem}-{name}.db')
+    return Config.INSTANCE_DIR / f'{name}.db'
+
+
+def create_cache(app):
+    backend = Config.CACHE_BACKEND
+    if backend == 'redis':
+        if Config.CACHE_URL.startswith('fakeredis://'):
+            import fakeredis
+            return RedisCache(fakeredis.FakeRedis(), default_ttl=Config.CACHE_DEFAULT_TTL)
+        if not REDIS_AVAILABLE:
+            logger.warning("CACHE_BACKEND=redis but the redis package is not installed; using the local cache")
+        else:
+            import redis
+            return RedisCache(redis.Redis.from_url(Config.CACHE_URL), default_ttl=Config.CACHE_DEFAULT_TTL)
+    if backend == 'sqlite':
+        path = Path(Config.CACHE_PATH) if Config.CACHE_PATH else sidecar_path(app, 'cache')
+        return SQLiteCache(path, max_entries=Config.CACHE_MAX_ENTRIES, default_ttl=Config.CACHE_DEFAULT_TTL)
+    return LocalCache(max_entries=Config.CACHE_MAX_ENTRIES, default_ttl=Config.CACHE_DEFAULT_TTL)
+
+
+_cache = LocalCache()
+
+
+def get_cache():
+    return _cache
+
+
+def cached(key, loader, ttl=None, tags=()):
+    """Shortcut for get_cache().get_or_set(); cache errors fall back to loader()"""
+    try:
+        return _cache.get_or_set(key, loader, ttl=ttl, tags=tags)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Cache unavailable for %s: %s", key, e)
+        return loader()
+
+
+def invalidate_tags(tags):
+    try:
+        _cache.invalidate_tags(tags)
+    except Exception:
+        logger.exception("Could not invalidate cache tags %s", sorted(tags))
+
+
+def clear_cache():
+    try:
+        _cache.clear()
+    except Exception:
+        logger.exception("Could not clear the cache")
+
+
+def _team_id(obj):
+    if isinstance(obj, Team):
+        return obj.id
+    if isinstance(obj, (Member, TeamLogin)):
+        return obj.team_id
+    return None
+
+
+def _before_flush(session, flush_context, instances):
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj)
+    ]:
+        tags.add(obj.__table__.name)
+        team_id = _team_id(obj)
+        if team_id is not None:
+            tags.add(f'team:{team_id}')
+
+
+def tag_written(session, *tags):
+    """Invalidate tags when the session commits, for writes that skip the flush"""
+    session.info.setdefault('cache_tags', set()).update(tags)
+
+
+def _after_commit(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        invalidate_tags(tags)
+
+
+def _after_rollback(session):
+    session.info.pop('cache_tags', None)
+
+
+def init_app(app):
+    global _cache
+    _cache = create_cache(app)
+    for name, listener in (
+        ('before_flush', _before_flush),
+        ('after_commit', _after_commit),
+        ('after_rollback', _after_rollback),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -0,0 +1,35 @@
+"""
+One-time setup commands.
+
+    flask --app wsgi init-db
+
+Creates the instance/ and uploads/ directories, the tables, and the columns
+added since an older database was created, and recounts problem statement
+selections. create_app does none of this,
+so worker boot never writes to the database; run init-db once per deploy
+(the Procfile's release step does) and after pointing DATABASE_URL at a
+new database.
+"""
+import click
+
+from app.config import Config
+from app.models import db
+from app.sync import upgrade_schema
+from app.selection import recount_selections
+
+
+def init_db():
+    """Create directories, tables and missing columns. Needs an app context."""
+    Config.create_directories()
+    db.create_all()
+    upgrade_schema()
+    # Fills the slot counts of an upgraded database and repairs any drift
+    recount_selections()
+
+
+def init_app(app):
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the database tables and upgrade older schemas."""
+        init_db()
+        click.echo(f"Database ready at {app.config['SQLALCHEMY_DATABASE_URI']}")
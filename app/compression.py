@@ -0,0 +1,189 @@
+"""
+Negotiated response compression.
+
+Responses with an allowlisted content type are compressed with the best
+encoding the client accepts (br, zstd or gzip, in that order of preference
+on ties). Buffered bodies smaller than COMPRESSION_MIN_SIZE are sent as-is;
+generator responses are compressed as they are produced and flushed every
+STREAM_FLUSH_BYTES of input, so streaming keeps working. Files sent with
+send_file (uploads, static pages) are left to the front proxy.
+
+An encoded response is a different representation, so its ETag gets an
+encoding suffix ("abc" -> "abc-gzip"). The suffix is stripped from
+If-None-Match before the views run, so the existing ETag checks keep
+matching and answer 304.
+"""
+import gzip
+import re
+import zlib
+
+from flask import g, request
+
+from app.config import Config
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = frozenset([
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+])
+
+_ETAG_SUFFIX = re.compile(r'-(br|zstd|gzip)"')
+
+# Flushing every tiny chunk would cost more bytes than it saves
+STREAM_FLUSH_BYTES = 16 * 1024
+
+
+class _GzipStream:
+    def __init__(self):
+        self._obj = zlib.compressobj(Config.COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=Config.BROTLI_QUALITY)
+
+    def compress(self, chunk):
+        return self._obj.process(chunk)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=Config.ZSTD_LEVEL).compressobj()
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=Config.COMPRESSION_LEVEL, mtime=0)
+
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first"""
+    encodings = {}
+    if BROTLI_AVAILABLE:
+        encodings['br'] = (lambda data: brotli.compress(data, quality=Config.BROTLI_QUALITY), _BrotliStream)
+    if ZSTD_AVAILABLE:
+        encodings['zstd'] = (lambda data: zstandard.ZstdCompressor(level=Config.ZSTD_LEVEL).compress(data), _ZstdStream)
+    encodings['gzip'] = (_gzip, _GzipStream)
+    return encodings
+
+
+_ENCODINGS = available_encodings()
+
+
+def _strip_etag_encoding():
+    header = request.environ.get('HTTP_IF_NONE_MATCH')
+    if not header or not _ETAG_SUFFIX.search(header):
+        return
+    g._etag_encoding = _ETAG_SUFFIX.search(header).group(1)
+    request.environ['HTTP_IF_NONE_MATCH'] = _ETAG_SUFFIX.sub('"', header)
+    request.__dict__.pop('if_none_match', None)
+
+
+def _tag_etag(response, encoding):
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+
+
+def _stream(iterable, stream):
+    pending = 0
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = stream.compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_BYTES:
+                data += stream.flush()
+                pending = 0
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if response.status_code == 304:
+        # Keep the validator the client holds for the encoded representation
+        encoding = g.get('_etag_encoding')
+        if encoding:
+            _tag_etag(response, encoding)
+        return response
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    encoding = request.accept_encodings.best_match(list(_ENCODINGS))
+    if encoding is None:
+        return response
+    one_shot, stream_class = _ENCODINGS[encoding]
+
+    if response.is_streamed:
+        response.response = _stream(response.response, stream_class())
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < Config.COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(one_shot(data))
+    response.headers['Content-Encoding'] = encoding
+    _tag_etag(response, encoding)
+    return response
+
+
+def init_app(app):
+    if not Config.COMPRESSION_ENABLED:
+        return
+    app.before_request(_strip_etag_encoding)
+    # Register before the other after_request hooks so this one runs last
+    app.after_request(compress_response)
@@ -0,0 +1,111 @@
+"""
+Conditional GET for read endpoints.
+
+Every flush bumps a counter per written table in table_versions. Views
+decorated with @conditional_get('teams', 'members') get an ETag built from
+those counters, the database generation (so a restore changes it) and the
+query string (so each filtered view has its own), and a Last-Modified from
+the newest bump. A matching If-None-Match or
+If-Modified-Since is answered with 304 from that one small query, before
+the view runs; otherwise the view's 200 response gets the validators and a
+Cache-Control header so a reverse proxy or CDN can revalidate the same way.
+"""
+import functools
+import hashlib
+from datetime import datetime
+
+from flask import make_response, request
+from sqlalchemy import event
+from werkzeug.http import is_resource_modified
+
+from app.models import db, TableVersion
+from app.restore import read_generation
+
+
+def _written_tables(session):
+    tables = {obj.__table__.name for obj in session.new}
+    tables |= {obj.__table__.name for obj in session.deleted}
+    tables |= {obj.__table__.name for obj in session.dirty if session.is_modified(obj)}
+    tables.discard(TableVersion.__tablename__)
+    return tables
+
+
+def _before_flush(session, flush_context, instances):
+    tables = _written_tables(session)
+    if tables:
+        bump_table_versions(session, tables)
+
+
+def bump_table_versions(session, tables):
+    """Bump the given tables' versions in the session's transaction.
+
+    Flushes do this themselves; Core UPDATEs, which skip the flush, call it.
+    """
+    conn = session.connection()
+    versions = TableVersion.__table__
+    now = datetime.utcnow()
+    for table_name in sorted(tables):
+        result = conn.execute(
+            versions.update()
+            .where(versions.c.table_name == table_name)
+            .values(version=versions.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            conn.execute(versions.insert().values(table_name=table_name, version=1, updated_at=now))
+
+
+def table_versions(*tables):
+    """Map of table name -> (version, updated_at) for the given tables"""
+    rows = db.session.query(
+        TableVersion.table_name, TableVersion.version, TableVersion.updated_at
+    ).filter(TableVersion.table_name.in_(tables)).all()
+    return {row.table_name: (row.version, row.updated_at) for row in rows}
+
+
+def validators(tables, view_args):
+    """ETag and Last-Modified for a view reading the given tables"""
+    versions = table_versions(*tables)
+    key = repr((
+        read_generation(),
+        [(table, versions.get(table, (0, None))[0]) for table in tables],
+        sorted(view_args.items()),
+        # Filters such as ?house= pick a different representation
+        request.query_string
+    ))
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+    timestamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    last_modified = max(timestamps).replace(microsecond=0) if timestamps else None
+    return etag, last_modified
+
+
+def conditional_get(*tables, max_age=0, private=False):
+    """Answer conditional GETs for a view whose output depends only on tables.
+
+    max_age=0 lets caches store the response but revalidate every time;
+    private=True keeps shared caches from storing it (e.g. member contact details).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = validators(tables, kwargs)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            scope = 'private' if private else 'public'
+            response.headers['Cache-Control'] = (
+                f'{scope}, max-age={max_age}' if max_age else f'{scope}, no-cache'
+            )
+            return response
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
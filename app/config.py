@@ -7,28 +7,104 @@ class Config:
     # Get base directory
     BASE_DIR = Path(__file__).parent.parent
     INSTANCE_DIR = BASE_DIR / 'instance'
-    INSTANCE_DIR.mkdir(exist_ok=True)
     
     # Database URI with absolute path
     DATABASE_PATH = INSTANCE_DIR / 'hogwarts_hackathon.db'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{DATABASE_PATH}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    # File upload settings
-    UPLOAD_FOLDER = BASE_DIR / 'uploads'
-    UPLOAD_FOLDER.mkdir(exist_ok=True)
+    # File upload settings; stored paths stay 'uploads/...' wherever the folder is
+    UPLOAD_FOLDER = Path(os.environ.get('UPLOAD_FOLDER') or BASE_DIR / 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    # Unfinished resumable uploads (app/resumable.py) are removed by `flask prune-uploads` after this long
+    UPLOAD_EXPIRY = int(os.environ.get('UPLOAD_EXPIRY') or str(24 * 3600))  # seconds
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
     
+    # File delivery: 'direct' (Flask sends the file), 'x-accel' (nginx) or 'x-sendfile'
+    FILE_DELIVERY = (os.environ.get('FILE_DELIVERY') or 'direct').lower()
+    # nginx internal location that maps to the project root (x-accel mode)
+    X_ACCEL_PREFIX = os.environ.get('X_ACCEL_PREFIX') or '/_protected'
+    # Longest side in pixels of payment proof thumbnails
+    THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE') or '320')
+    
+    # Logging level for the JSON logs written to stdout
+    LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+    
+    # SQL instrumentation - per-request query counts, slow query and N+1 logging
+    SQL_INSTRUMENTATION = (os.environ.get('SQL_INSTRUMENTATION') or 'true').lower() == 'true'
+    SQL_DEBUG_HEADERS = (os.environ.get('SQL_DEBUG_HEADERS') or 'false').lower() == 'true'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or '100')
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD') or '10')
+    
+    # Prometheus metrics at /metrics (the gunicorn profiles set PROMETHEUS_MULTIPROC_DIR)
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+    
+    # Request profiling: 1-in-N sampling and/or comma-separated endpoints, e.g. api.get_teams
+    PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE') or '0')
+    PROFILE_ROUTES = os.environ.get('PROFILE_ROUTES') or ''
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES') or '200')
+    
+    # JSON encoder for jsonify: 'auto' (orjson, then msgspec), 'orjson', 'msgspec' or 'stdlib'
+    JSON_BACKEND = (os.environ.get('JSON_BACKEND') or 'auto').lower()
+    
+    # Response compression (br/zstd/gzip, negotiated from Accept-Encoding)
+    COMPRESSION_ENABLED = (os.environ.get('COMPRESSION_ENABLED') or 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or '500')  # bytes
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or '6')  # gzip 1-9
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY') or '5')  # 0-11; 4-6 suits dynamic responses
+    ZSTD_LEVEL = int(os.environ.get('ZSTD_LEVEL') or '3')
+    
+    # Cache backend: 'sqlite' (shared by all workers, next to the database),
+    # 'local' (per-process LRU) or 'redis' (CACHE_URL, e.g. redis://localhost:6379/0)
+    CACHE_BACKEND = (os.environ.get('CACHE_BACKEND') or 'sqlite').lower()
+    CACHE_URL = os.environ.get('CACHE_URL') or ''
+    CACHE_PATH = os.environ.get('CACHE_PATH') or ''  # Defaults to <database>-cache.db
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or '300')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or '2048')
+    
+    # Admission control for /api: per-client token buckets and shedding of low-priority reads
+    ADMISSION_ENABLED = (os.environ.get('ADMISSION_ENABLED') or 'true').lower() == 'true'
+    # 'sqlite' (shared by all workers, next to the database) or 'local' (per process)
+    ADMISSION_BACKEND = (os.environ.get('ADMISSION_BACKEND') or 'sqlite').lower()
+    ADMISSION_PATH = os.environ.get('ADMISSION_PATH') or ''  # Defaults to <database>-admission.db
+    # Requests per client per bucket, "bucket=requests/seconds" or 'off'; buckets are assigned in app/admission.py
+    RATE_LIMITS = os.environ.get('RATE_LIMITS') or 'poll=120/60,browse=120/60,availability=300/60,login=20/60,default=600/60'
+    # In-flight API requests (all workers) at which low-priority reads get 503; 0 disables shedding
+    ADMISSION_SHED_AT = int(os.environ.get('ADMISSION_SHED_AT') or '24')
+    # Per-endpoint in-flight limits, "endpoint=limit,..." or 'off'
+    ADMISSION_ROUTE_LIMITS = os.environ.get('ADMISSION_ROUTE_LIMITS') or 'api.export_review_marks=2,api.download_database=1'
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER') or '5')  # seconds, before jitter
+    # Reverse proxies in front of the app that append to X-Forwarded-For (1 behind deploy/nginx.conf)
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT') or '0')
+    
+    # Registration intake: queued registrations are committed by one writer in batches
+    INTAKE_BATCH_SIZE = int(os.environ.get('INTAKE_BATCH_SIZE') or '50')
+    INTAKE_POLL_INTERVAL = float(os.environ.get('INTAKE_POLL_INTERVAL') or '0.1')  # seconds
+    
+    # /api/availability: seconds between checks of the sync counter by each worker's index
+    AVAILABILITY_REFRESH_INTERVAL = float(os.environ.get('AVAILABILITY_REFRESH_INTERVAL') or '1')
+    
     # Email configuration - use environment variables for security
+    EMAIL_ENABLED = (os.environ.get('EMAIL_ENABLED') or 'true').lower() == 'true'  # false for load tests
     SENDER_EMAIL = os.environ.get('SENDER_EMAIL') or 'hogwartshackathon@gmail.com'
     SENDER_PASSWORD = os.environ.get('SENDER_PASSWORD') or 'rmas bmmy ydis awjd'
     SMTP_SERVER = os.environ.get('SMTP_SERVER') or 'smtp.gmail.com'
     SMTP_PORT = int(os.environ.get('SMTP_PORT') or '587')  # 587 for TLS, 465 for SSL
     
-    # Ensure directories exist
+    # Directories are created by `flask init-db` (app.cli.init_db), not on import
+    @staticmethod
+    def create_directories():
+        Config.INSTANCE_DIR.mkdir(exist_ok=True)
+        Config.UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def upload_path(path):
+        """Location on disk of a stored path such as uploads/ab/cd/<sha256>.png"""
+        if path.startswith('uploads/'):
+            return Path(Config.UPLOAD_FOLDER) / path[len('uploads/'):]
+        return Config.BASE_DIR / path
+    
     @staticmethod
     def init_app(app):
-        # Directories are already created in class definition
         pass
 
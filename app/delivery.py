@@ -0,0 +1,49 @@
+"""
+File delivery.
+
+Flask always does the path checks; the bytes are either sent by the worker
+(direct mode, with Range and conditional request support) or handed to the
+front proxy with X-Accel-Redirect (nginx) or X-Sendfile (Apache/lighttpd),
+so a slow download does not hold a gunicorn worker.
+"""
+import mimetypes
+from pathlib import Path
+from urllib.parse import quote
+
+from flask import send_file, make_response
+
+from app.config import Config
+
+DELIVERY_MODES = ('direct', 'x-accel', 'x-sendfile')
+
+
+def _accel_path(file_path):
+    """Path below the project root; uploads map to uploads/ wherever UPLOAD_FOLDER is"""
+    resolved = file_path.resolve()
+    try:
+        return 'uploads/' + resolved.relative_to(Path(Config.UPLOAD_FOLDER).resolve()).as_posix()
+    except ValueError:
+        return resolved.relative_to(Config.BASE_DIR.resolve()).as_posix()
+
+
+def deliver_file(file_path, max_age=None):
+    """Return a response for a file that has already passed the path checks"""
+    file_path = Path(file_path)
+    mode = Config.FILE_DELIVERY
+
+    if mode == 'x-accel':
+        relative = _accel_path(file_path)
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = Config.X_ACCEL_PREFIX.rstrip('/') + '/' + quote(relative)
+    elif mode == 'x-sendfile':
+        response = make_response('')
+        response.headers['X-Sendfile'] = str(file_path.resolve())
+    else:
+        # send_file answers Range and If-None-Match/If-Modified-Since itself
+        return send_file(str(file_path), conditional=True, etag=True, max_age=max_age)
+
+    # The proxy fills in the body, length, ranges and validators
+    response.headers['Content-Type'] = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+    if max_age is not None:
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return response
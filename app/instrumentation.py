@@ -0,0 +1,82 @@
+"""
+Per-request SQL instrumentation.
+
+Cursor events count and time every query run while handling a request.
+Slow queries and statements repeated more than N_PLUS_ONE_THRESHOLD times
+in one request (a likely N+1 pattern) are logged with their endpoint, and
+X-DB-Queries / X-DB-Time headers are added in debug mode or when
+SQL_DEBUG_HEADERS is set (e.g. on staging).
+"""
+import logging
+import time
+from collections import Counter
+
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+
+from app.config import Config
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    __slots__ = ('count', 'total', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.statements = Counter()
+
+
+def _stats():
+    stats = g.get('_sql_stats')
+    if stats is None:
+        stats = g._sql_stats = QueryStats()
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    if not has_request_context():
+        return
+    stats = _stats()
+    stats.count += 1
+    stats.total += elapsed
+    stats.statements[statement] += 1
+    if elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        logger.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, request.endpoint, statement)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute is skipped for failed statements
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start_time'):
+        conn.info['query_start_time'].pop()
+
+
+def _after_request(response):
+    stats = g.get('_sql_stats')
+    if stats is None:
+        return response
+    for statement, times in stats.statements.items():
+        if times > Config.N_PLUS_ONE_THRESHOLD:
+            logger.warning('Possible N+1 in %s: statement ran %d times: %s', request.endpoint, times, statement)
+    if Config.SQL_DEBUG_HEADERS or current_app.debug:
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers['X-DB-Time'] = f'{stats.total * 1000:.2f}ms'
+    return response
+
+
+def init_app(app):
+    if not Config.SQL_INSTRUMENTATION:
+        return
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+    app.after_request(_after_request)
@@ -0,0 +1,183 @@
+"""
+Registration intake with group commit.
+
+POST /api/register validates the form, stores the payment proof and queues
+a RegistrationTicket in one short transaction, then answers 202 with the
+ticket id; the client polls GET /api/register/<ticket_id>.
+
+A single writer drains the queue. Every worker that handles intake starts a
+writer thread, but the thread first takes an flock on
+<database>-intake.lock, so only one process on the host writes; if that
+process exits, the lock is released and another worker's thread takes
+over. The writer applies up to INTAKE_BATCH_SIZE queued registrations in
+one transaction. Each runs in a savepoint, so a rejected ticket (e.g. a
+team name taken earlier in the same batch) does not undo the others.
+Uniqueness is checked at intake for quick feedback and again by the writer,
+whose check is the one that counts.
+"""
+import fcntl
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+
+from app.cache import sidecar_path
+from app.config import Config
+from app.json_provider import dumps as json_dumps, loads as json_loads
+from app.models import db, Team, Member, RegistrationTicket
+from app.restore import check_generation
+from app.thumbnails import schedule_thumbnail
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_writer_pid = None
+
+
+class RegistrationError(Exception):
+    """A registration that cannot be accepted; the message is shown to the user"""
+
+
+def check_unique(team_name, emails):
+    """Raise RegistrationError if the team name or a member email is taken.
+
+    One lookup on the lower(team_name) index and one IN query on the email
+    index, however many members the team has.
+    """
+    taken_name = db.session.query(Team.id).filter(
+        db.func.lower(Team.team_name) == db.func.lower(team_name)
+    ).first()
+    if taken_name:
+        raise RegistrationError('Team name already exists')
+    taken = {row.email for row in db.session.query(Member.email).filter(Member.email.in_(set(emails)))}
+    for email in emails:
+        if email in taken:
+            raise RegistrationError(f'Email {email} is already registered')
+
+
+def enqueue(payload):
+    """Add a queued ticket for validated registration data to the session"""
+    ticket = RegistrationTicket(id=uuid.uuid4().hex, status='queued', payload=json_dumps(payload))
+    db.session.add(ticket)
+    return ticket
+
+
+def notify():
+    """Wake this process's writer, if it is the one holding the lock"""
+    _wake.set()
+
+
+def apply_registration(payload):
+    """Create the team and its members. Raises RegistrationError."""
+    check_unique(payload['team_name'], [member['email'] for member in payload['members']])
+    team = Team(
+        team_name=payload['team_name'],
+        house=payload['house'],
+        team_size=payload['team_size'],
+        utr_transaction_id=payload['utr_transaction_id'],
+        payment_proof_path=payload['payment_proof_path'],
+        approval_status='pending'
+    )
+    # The members go in with the team's flush; SQLite gets one INSERT per member,
+    # since each needs its id back (RETURNING) and the ORM does not batch those
+    team.members = [
+        Member(
+            name=member['name'],
+            email=member['email'],
+            phone=member['phone'],
+            college_name=member['college_name'],
+            is_leader=(order == 1),
+            member_order=order
+        )
+        for order, member in enumerate(payload['members'], start=1)
+    ]
+    db.session.add(team)
+    db.session.flush()
+    return team
+
+
+def process_batch():
+    """Apply one batch of queued tickets in a single transaction. Returns the number processed."""
+    tickets = RegistrationTicket.query.filter_by(status='queued').order_by(
+        RegistrationTicket.created_at, RegistrationTicket.id
+    ).limit(Config.INTAKE_BATCH_SIZE).all()
+    if not tickets:
+        return 0
+
+    proofs = []
+    now = datetime.utcnow()
+    for ticket in tickets:
+        payload = json_loads(ticket.payload)
+        try:
+            with db.session.begin_nested():
+                team = apply_registration(payload)
+            ticket.status = 'accepted'
+            ticket.team_id = team.id
+            proofs.append(payload['payment_proof_path'])
+        except RegistrationError as e:
+            ticket.status = 'rejected'
+            ticket.error = str(e)
+        except OperationalError:
+            # e.g. the database is locked; the batch is rolled back and retried
+            raise
+        except Exception as e:
+            logger.exception("Registration ticket %s failed", ticket.id)
+            ticket.status = 'rejected'
+            ticket.error = f'Failed to save data: {e}'
+        ticket.processed_at = now
+    db.session.commit()
+
+    # Render the payment proof previews for the approval queue in the background
+    for path in proofs:
+        schedule_thumbnail(path)
+    logger.info("Committed %d registrations (%d rejected)", len(tickets), len(tickets) - len(proofs))
+    return len(tickets)
+
+
+def _writer_loop(app, lock_path):
+    lock_fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+    # Blocks until no other process on the host is the writer
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    logger.info("Registration writer running in process %d", os.getpid())
+    while True:
+        # Woken at once for intake in this process, otherwise poll for other workers' tickets
+        _wake.wait(Config.INTAKE_POLL_INTERVAL)
+        _wake.clear()
+        with app.app_context():
+            try:
+                # Requests do this in before_request; the writer may be in a
+                # process that serves none, and must not keep writing to a
+                # database file that a restore has replaced
+                check_generation()
+                while process_batch() == Config.INTAKE_BATCH_SIZE:
+                    pass
+            except OperationalError as e:
+                logger.warning("Registration batch rolled back, will retry: %s", e)
+                db.session.rollback()
+            except Exception:
+                logger.exception("Registration writer batch failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+def ensure_writer():
+    """Start this process's writer thread if it is not running (e.g. after a fork)"""
+    global _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _lock:
+        if _writer_pid == os.getpid():
+            return
+        app = current_app._get_current_object()
+        lock_path = sidecar_path(app, 'intake').with_suffix('.lock')
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        threading.Thread(
+            target=_writer_loop, args=(app, lock_path), name='registration-writer', daemon=True
+        ).start()
+        _writer_pid = os.getpid()
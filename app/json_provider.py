@@ -0,0 +1,136 @@
+"""
+JSON provider for jsonify and request.get_json.
+
+Uses orjson or msgspec when installed (JSON_BACKEND=auto picks the first
+available), otherwise the stdlib encoder. Every backend writes datetimes as
+ISO 8601 strings itself, so the models' to_dict() hand over datetime objects
+instead of calling isoformat(). Keys are sorted, as with Flask's default
+provider. dumps()/loads() here use the same backend outside a request,
+e.g. for the JSON stored in Review rows.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+from app.config import Config
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+
+def _default(o):
+    """Types the fast encoders do not handle themselves"""
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, but with ISO 8601 datetimes like the fast backends"""
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(JSONProvider):
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if ORJSON_AVAILABLE else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self.options | orjson.OPT_APPEND_NEWLINE
+        if self._app.debug:
+            options |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=options), mimetype='application/json'
+        )
+
+
+class MsgspecProvider(JSONProvider):
+    def __init__(self, app):
+        super().__init__(app)
+        self._encoder = msgspec.json.Encoder(enc_hook=_default, order='sorted')
+        self._unsorted_encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decoder = msgspec.json.Decoder()
+
+    def _encode(self, obj):
+        try:
+            return self._encoder.encode(obj)
+        except TypeError:
+            # Sorting only works with str keys; e.g. review exports are keyed by number
+            return self._unsorted_encoder.encode(obj)
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return self._decoder.decode(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        data = self._encode(obj)
+        if self._app.debug:
+            data = msgspec.json.format(data, indent=2)
+        return self._app.response_class(data + b'\n', mimetype='application/json')
+
+
+def select_backend(name=None):
+    """Resolve JSON_BACKEND ('auto', 'orjson', 'msgspec' or 'stdlib') to an installed backend"""
+    name = (name or Config.JSON_BACKEND).lower()
+    if name in ('auto', 'orjson') and ORJSON_AVAILABLE:
+        return 'orjson'
+    if name in ('auto', 'msgspec', 'orjson') and MSGSPEC_AVAILABLE:
+        return 'msgspec'
+    return 'stdlib'
+
+
+PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'msgspec': MsgspecProvider,
+    'stdlib': StdlibJSONProvider,
+}
+
+BACKEND = select_backend()
+
+if BACKEND == 'orjson':
+    loads = orjson.loads
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default).decode('utf-8')
+elif BACKEND == 'msgspec':
+    loads = msgspec.json.decode
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+
+    def dumps(obj):
+        return _encoder.encode(obj).decode('utf-8')
+else:
+    loads = json.loads
+
+    def dumps(obj):
+        return json.dumps(obj, default=_default)
+
+
+def init_app(app):
+    app.json = PROVIDERS[BACKEND](app)
@@ -0,0 +1,132 @@
+"""
+Structured logging.
+
+Every record is formatted as one JSON line with the request ID and endpoint
+of the request that produced it. Handlers on the request path only put
+records on a queue; a QueueListener thread does the formatting and the
+stdout write. LOG_LEVEL sets the level (INFO by default). Debug logging on
+hot paths sits under `if __debug__:`, so running with `python -O` /
+PYTHONOPTIMIZE=1 removes it at compile time.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+
+from flask import g, request, has_request_context
+
+from app.config import Config
+
+_listener = None
+_queue = None
+_plain_formatter = logging.Formatter()
+
+# LogRecord attributes that are not user supplied "extra" fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id', 'endpoint'}
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request ID and endpoint to every record"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.endpoint = request.endpoint
+        else:
+            record.request_id = None
+            record.endpoint = None
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve the message and traceback on the request thread, but keep the
+        # record's fields so the listener can still emit structured JSON
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _plain_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            data['request_id'] = record.request_id
+            data['endpoint'] = record.endpoint
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith('_'):
+                data[key] = value
+        if record.exc_text:
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+def _start_listener():
+    global _listener
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(_queue, handler, respect_handler_level=False)
+    _listener.start()
+
+
+def _stop_listener():
+    # Flush queued records on interpreter exit
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork (e.g. gunicorn --preload)
+    if _listener is not None:
+        _start_listener()
+
+
+def configure_logging():
+    """Route the root logger through a queue to a background JSON writer"""
+    global _queue
+    if _queue is not None:
+        return
+    _queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(_queue)
+    # Fill in request context on the request thread, before the record is queued
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(Config.LOG_LEVEL)
+
+    _start_listener()
+    atexit.register(_stop_listener)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _assign_request_id():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+
+def _add_request_id_header(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers['X-Request-ID'] = request_id
+    return response
+
+
+def init_app(app):
+    configure_logging()
+    app.before_request(_assign_request_id)
+    app.after_request(_add_request_id_header)
@@ -0,0 +1,108 @@
+"""
+Prometheus metrics.
+
+Records request counts, status codes, latency histograms and in-flight
+requests for every api_bp endpoint, plus credential email outcomes, and
+serves them at /metrics. Under gunicorn, PROMETHEUS_MULTIPROC_DIR is a
+directory shared by all workers (profiles/base.py makes a fresh one) so
+/metrics aggregates every process.
+"""
+import functools
+import os
+import time
+
+from flask import g, request, Response
+
+from app.config import Config
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+    )
+    from prometheus_client import multiprocess
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+if PROMETHEUS_AVAILABLE:
+    REQUEST_COUNT = Counter(
+        'hogwarts_http_requests_total', 'API requests by endpoint, method and status',
+        ['endpoint', 'method', 'status']
+    )
+    REQUEST_LATENCY = Histogram(
+        'hogwarts_http_request_duration_seconds', 'API request latency by endpoint',
+        ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+    )
+    REQUESTS_IN_FLIGHT = Gauge(
+        'hogwarts_http_requests_in_flight', 'API requests currently being handled',
+        ['endpoint'], multiprocess_mode='livesum'
+    )
+    EMAIL_SENT = Counter(
+        'hogwarts_emails_total', 'Credential emails by outcome', ['outcome']
+    )
+    EMAIL_DURATION = Histogram(
+        'hogwarts_email_send_duration_seconds', 'Time spent sending credential emails',
+        buckets=(0.5, 1, 2.5, 5, 10, 20, 40, 80)
+    )
+
+
+def _before_request():
+    if request.blueprint != 'api':
+        return
+    g._metrics_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.labels(request.endpoint).inc()
+
+
+def _after_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    endpoint = request.endpoint
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+    REQUEST_COUNT.labels(endpoint, request.method, str(response.status_code)).inc()
+    REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+    return response
+
+
+def track_email(func):
+    """Record the outcome and duration of an email sending function"""
+    if not PROMETHEUS_AVAILABLE:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'sent' if result else 'failed'
+            return result
+        finally:
+            EMAIL_DURATION.observe(time.perf_counter() - start)
+            EMAIL_SENT.labels(outcome).inc()
+    return wrapper
+
+
+def metrics_view():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead(pid):
+    """Gunicorn child_exit hook - drop live gauges of a finished worker"""
+    if PROMETHEUS_AVAILABLE and 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+def init_app(app):
+    if not (Config.METRICS_ENABLED and PROMETHEUS_AVAILABLE):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
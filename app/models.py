@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
+from app.json_provider import loads as json_loads
 
 db = SQLAlchemy()
 
@@ -17,18 +17,23 @@ class Team(db.Model):
     approval_status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     selected_problem_statement_id = db.Column(db.Integer, db.ForeignKey('problem_statements.id'), nullable=True)
     git_repo_url = db.Column(db.String(500), nullable=True)  # GitHub/GitLab repository URL
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    row_version = db.Column(db.Integer, nullable=False, default=0, index=True)  # Sync cursor, see app/sync.py
     
     # Relationships
     members = db.relationship('Member', backref='team', lazy=True, cascade='all, delete-orphan')
     selected_problem = db.relationship('ProblemStatement', foreign_keys=[selected_problem_statement_id], backref='teams_selected')
     
+    # Case-insensitive name lookups at registration (app/intake.py)
+    __table_args__ = (db.Index('ix_teams_team_name_lower', db.func.lower(team_name)),)
+    
     def to_dict(self):
         return {
             'id': self.id,
             'team_name': self.team_name,
             'house': self.house,
             'team_size': self.team_size,
-            'registered_at': self.registered_at.isoformat() if self.registered_at else None,
+            'registered_at': self.registered_at,
             'approval_status': self.approval_status,
             'utr_transaction_id': self.utr_transaction_id,
             'payment_proof_path': self.payment_proof_path,
@@ -74,11 +79,13 @@ class Member(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
     name = db.Column(db.String(200), nullable=False)
-    email = db.Column(db.String(200), nullable=False)
+    email = db.Column(db.String(200), nullable=False, index=True)
     phone = db.Column(db.String(20), nullable=False)
     college_name = db.Column(db.String(200), nullable=True)
     is_leader = db.Column(db.Boolean, default=False)
     member_order = db.Column(db.Integer, nullable=False)  # Order in team (1, 2, 3, 4)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    row_version = db.Column(db.Integer, nullable=False, default=0, index=True)
     
     def to_dict(self):
         return {
@@ -101,6 +108,14 @@ class ProblemStatement(db.Model):
     difficulty = db.Column(db.String(20), nullable=False)  # easy, medium, hard
     house = db.Column(db.String(50), nullable=True)  # null means available to all houses
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    capacity = db.Column(db.Integer, nullable=True)  # Max teams; null means unlimited
+    selected_count = db.Column(db.Integer, nullable=False, default=0)  # Teams holding a slot, see app/selection.py
+    
+    @property
+    def remaining(self):
+        if self.capacity is None:
+            return None
+        return max(0, self.capacity - (self.selected_count or 0))
     
     def to_dict(self):
         return {
@@ -110,7 +125,10 @@ class ProblemStatement(db.Model):
             'domain': self.domain,
             'difficulty': self.difficulty,
             'house': self.house,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'capacity': self.capacity,
+            'selected_count': self.selected_count or 0,
+            'remaining': self.remaining,
+            'created_at': self.created_at
         }
 
 class AdminSettings(db.Model):
@@ -144,6 +162,8 @@ class TeamLogin(db.Model):
     password = db.Column(db.String(200), nullable=False)  # UTR
     house = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    row_version = db.Column(db.Integer, nullable=False, default=0, index=True)
     
     # Relationship
     team = db.relationship('Team', backref='login_credentials', uselist=False)
@@ -154,7 +174,7 @@ class TeamLogin(db.Model):
             'team_id': self.team_id,
             'username': self.username,
             'house': self.house,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Review(db.Model):
@@ -184,7 +204,7 @@ class Review(db.Model):
                     'criteria': []
                 }
             try:
-                data = json.loads(data_str)
+                data = json_loads(data_str)
                 data['marks'] = getattr(self, f'review{review_num}_marks', 0)
                 return data
             except:
@@ -200,8 +220,8 @@ class Review(db.Model):
             'review1': parse_review_data(self.review1_data, 1),
             'review2': parse_review_data(self.review2_data, 2),
             'review3': parse_review_data(self.review3_data, 3),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
     
     def get_review(self, review_number):
@@ -220,7 +240,7 @@ class Review(db.Model):
             }
         
         try:
-            data = json.loads(data_str)
+            data = json_loads(data_str)
             data['marks'] = marks
             return data
         except:
@@ -247,6 +267,83 @@ class Sponsor(db.Model):
             'logo_path': self.logo_path,
             'redirect_url': self.redirect_url or '',
             'display_order': self.display_order,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
+        }
+
+
+class StoredFile(db.Model):
+    __tablename__ = 'stored_files'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), nullable=False, unique=True)  # e.g. uploads/ab/cd/<sha256>.jpg
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)  # Size in bytes
+    content_type = db.Column(db.String(100), nullable=True)
+    original_filename = db.Column(db.String(300), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'sha256': self.sha256,
+            'size': self.size,
+            'content_type': self.content_type,
+            'original_filename': self.original_filename,
+            'created_at': self.created_at
         }
 
+
+class SyncCounter(db.Model):
+    __tablename__ = 'sync_counter'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Single row, id 1
+    value = db.Column(db.Integer, nullable=False, default=0)  # Last row_version handed out
+
+
+class TeamTombstone(db.Model):
+    __tablename__ = 'team_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, nullable=False, index=True)  # No foreign key - the team is gone
+    team_name = db.Column(db.String(200), nullable=False)
+    reason = db.Column(db.String(20), nullable=False)  # rejected, deleted
+    row_version = db.Column(db.Integer, nullable=False, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'team_id': self.team_id,
+            'team_name': self.team_name,
+            'reason': self.reason,
+            'deleted_at': self.deleted_at
+        }
+
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped by every flush that writes the table
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class RegistrationTicket(db.Model):
+    __tablename__ = 'registration_tickets'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, handed to the client to poll
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, accepted, rejected
+    payload = db.Column(db.Text, nullable=False)  # Validated form data as JSON, see app/intake.py
+    team_id = db.Column(db.Integer, nullable=True)  # Set once accepted
+    error = db.Column(db.Text, nullable=True)  # Reason for a rejection
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'ticket_id': self.id,
+            'status': self.status,
+            'team_id': self.team_id,
+            'error': self.error,
+            'created_at': self.created_at,
+            'processed_at': self.processed_at
+        }
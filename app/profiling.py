@@ -0,0 +1,128 @@
+"""
+On-demand request profiling.
+
+Profiling is off unless PROFILE_SAMPLE_RATE / PROFILE_ROUTES are set or an
+admin enables it (AdminSettings keys 'profiling_sample_rate' and
+'profiling_routes'). Sampled requests run under cProfile and are written to
+instance/profiles/ as .pstats files named after the endpoint and duration;
+they load in pstats, snakeviz or flameprof. Only the newest
+PROFILE_MAX_FILES dumps are kept.
+
+Each worker keeps the settings in memory and re-reads them at most every
+SETTINGS_TTL seconds, on a short-lived connection outside the request's
+session; the worker that saves new settings reloads at once.
+"""
+import cProfile
+import itertools
+import logging
+import re
+import time
+from datetime import datetime
+
+from flask import g, request
+
+from app.config import Config
+from app.models import db, AdminSettings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Config.INSTANCE_DIR / 'profiles'
+
+# Settings are re-read from the database at most this often
+SETTINGS_TTL = 10
+
+_settings = {'sample_rate': 0, 'routes': frozenset(), 'loaded_at': None}
+_request_counter = itertools.count(1)
+
+
+def parse_routes(value):
+    return frozenset(route.strip() for route in (value or '').split(',') if route.strip())
+
+
+def _load_settings():
+    sample_rate = Config.PROFILE_SAMPLE_RATE
+    routes = parse_routes(Config.PROFILE_ROUTES)
+    settings = AdminSettings.__table__
+    try:
+        # A connection of its own, so the request's session never starts a
+        # transaction here and its first query is still its own
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                db.select(settings.c.key, settings.c.value)
+                .where(settings.c.key.in_(['profiling_sample_rate', 'profiling_routes']))
+            ).all()
+        values = {row.key: row.value for row in rows}
+        if values.get('profiling_sample_rate'):
+            sample_rate = int(values['profiling_sample_rate'])
+        if values.get('profiling_routes'):
+            routes = routes | parse_routes(values['profiling_routes'])
+    except Exception as e:
+        logger.warning("Could not load profiling settings: %s", e)
+    _settings.update(sample_rate=sample_rate, routes=routes, loaded_at=time.monotonic())
+
+
+def invalidate_settings():
+    _settings['loaded_at'] = None
+
+
+def current_settings():
+    loaded_at = _settings['loaded_at']
+    if loaded_at is None or time.monotonic() - loaded_at > SETTINGS_TTL:
+        _load_settings()
+    return _settings
+
+
+def _should_profile():
+    settings = current_settings()
+    if request.endpoint in settings['routes'] or request.path in settings['routes']:
+        return True
+    rate = settings['sample_rate']
+    return rate > 0 and next(_request_counter) % rate == 0
+
+
+def _before_request():
+    if not _should_profile():
+        return
+    profiler = cProfile.Profile()
+    g._profiler = profiler
+    g._profile_start = time.perf_counter()
+    profiler.enable()
+
+
+def _after_request(response):
+    profiler = g.pop('_profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    duration_ms = (time.perf_counter() - g.pop('_profile_start')) * 1000
+    try:
+        _dump(profiler, request.endpoint or 'unknown', duration_ms)
+    except Exception:
+        logger.exception("Could not write profile")
+    return response
+
+
+def _dump(profiler, endpoint, duration_ms):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    safe_endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint)
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    profiler.dump_stats(str(PROFILE_DIR / f'{timestamp}_{safe_endpoint}_{duration_ms:.0f}ms.pstats'))
+
+    # Bounded retention - drop the oldest dumps
+    dumps = sorted(PROFILE_DIR.glob('*.pstats'))
+    for old in dumps[:-Config.PROFILE_MAX_FILES]:
+        old.unlink(missing_ok=True)
+
+
+def list_profiles():
+    if not PROFILE_DIR.exists():
+        return []
+    return [
+        {'name': path.name, 'size': path.stat().st_size}
+        for path in sorted(PROFILE_DIR.glob('*.pstats'), reverse=True)
+    ]
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
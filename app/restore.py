@@ -0,0 +1,211 @@
+"""
+Database restore helpers.
+
+Uploaded databases are streamed to a temp file next to the live database,
+validated, and swapped in with os.replace, after a snapshot of the live
+database is saved beside it as a backup. Every worker keeps track of a
+generation counter stored beside the database; when a restore bumps it,
+the next request handled by each worker disposes its engine so no worker
+keeps reading the replaced file.
+"""
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from app.config import Config
+from app.models import db
+from app.sync import UPGRADE_COLUMNS, upgrade_schema
+from app.cache import clear_cache, sidecar_path
+
+logger = logging.getLogger(__name__)
+
+
+class RestoreError(Exception):
+    """Raised when an uploaded database fails validation"""
+
+
+# Tables every hackathon database has had since the first release
+REQUIRED_TABLES = ('teams', 'members')
+
+# Beside the database (<db>-generation), set by init_app
+GENERATION_FILE = Config.INSTANCE_DIR / 'db_generation'
+
+# Generation last seen by this worker process (mtime_ns, counter)
+_seen_generation = {'mtime_ns': None, 'value': 0}
+
+
+def read_generation():
+    """Return the current database generation counter"""
+    try:
+        return int(GENERATION_FILE.read_text().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def bump_generation():
+    """Increment the generation counter atomically and return the new value"""
+    value = read_generation() + 1
+    fd, tmp_path = tempfile.mkstemp(dir=str(GENERATION_FILE.parent), prefix='.db_generation_')
+    with os.fdopen(fd, 'w') as tmp:
+        tmp.write(str(value))
+    os.replace(tmp_path, str(GENERATION_FILE))
+    _remember_generation()
+    return value
+
+
+def _remember_generation():
+    try:
+        _seen_generation['mtime_ns'] = os.stat(GENERATION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        _seen_generation['mtime_ns'] = None
+    _seen_generation['value'] = read_generation()
+
+
+def check_generation():
+    """Dispose this worker's engine if another worker restored the database.
+
+    Runs before every request, so it only stats the generation file and reads
+    it when the mtime changed.
+    """
+    try:
+        mtime_ns = os.stat(GENERATION_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+    if mtime_ns == _seen_generation['mtime_ns']:
+        return
+    value = read_generation()
+    _seen_generation['mtime_ns'] = mtime_ns
+    if value != _seen_generation['value']:
+        _seen_generation['value'] = value
+        db.session.remove()
+        db.engine.dispose()
+        clear_cache()
+
+
+def expected_schema():
+    """Map of table name -> set of column names defined by the models"""
+    return {
+        table.name: {column.name for column in table.columns}
+        for table in db.metadata.sorted_tables
+    }
+
+
+def validate_database(path):
+    """Run integrity and schema checks on a SQLite file, raising RestoreError"""
+    try:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    except sqlite3.Error as e:
+        raise RestoreError(f'Could not open database: {e}')
+    try:
+        try:
+            result = conn.execute('PRAGMA integrity_check').fetchall()
+        except sqlite3.DatabaseError as e:
+            raise RestoreError(f'File is not a valid SQLite database: {e}')
+        if result != [('ok',)]:
+            problems = '; '.join(row[0] for row in result[:5])
+            raise RestoreError(f'Integrity check failed: {problems}')
+
+        tables = {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        for table in REQUIRED_TABLES:
+            if table not in tables:
+                raise RestoreError(f'Missing table: {table}')
+        # Tables and sync columns added in newer versions are created after the
+        # swap, but any table that is present must have every other column
+        for table, columns in expected_schema().items():
+            if table not in tables:
+                continue
+            present = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+            missing = columns - present - set(UPGRADE_COLUMNS.get(table, ()))
+            if missing:
+                raise RestoreError(f'Table {table} is missing columns: {", ".join(sorted(missing))}')
+    finally:
+        conn.close()
+
+
+def database_path():
+    """The SQLite file behind the app's engine, which a restore replaces"""
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise RestoreError('Restores need a file-backed SQLite database')
+    return Path(url.database)
+
+
+def snapshot_database(db_path, backup_path):
+    """Copy a consistent snapshot of a live database with SQLite's backup API"""
+    source = sqlite3.connect(str(db_path))
+    try:
+        target = sqlite3.connect(str(backup_path))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def restore_database(stream):
+    """Stream an uploaded database into place.
+
+    Returns the backup file name (or None) and the new generation number.
+    """
+    db_path = database_path()
+    fd, tmp_path = tempfile.mkstemp(dir=str(db_path.parent), prefix='.restore_', suffix='.db')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            shutil.copyfileobj(stream, tmp, 1024 * 1024)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+
+        validate_database(tmp_path)
+
+        # Keep the current database as a backup. Writers are locked out from
+        # the snapshot until the swap, so no commit lands in the old file
+        # after it was copied; readers carry on meanwhile
+        backup_path = None
+        write_lock = None
+        db.session.remove()
+        if db_path.exists():
+            write_lock = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+            try:
+                write_lock.execute('BEGIN IMMEDIATE')
+            except BaseException:
+                write_lock.close()
+                raise
+            backup_path = db_path.parent / f'hogwarts_hackathon_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
+            try:
+                snapshot_database(db_path, backup_path)
+            except sqlite3.Error as backup_error:
+                logger.warning("Could not create backup: %s", backup_error)
+                backup_path.unlink(missing_ok=True)
+                backup_path = None
+
+        try:
+            os.replace(tmp_path, str(db_path))
+        finally:
+            if write_lock is not None:
+                write_lock.rollback()
+                write_lock.close()
+        db.engine.dispose()
+        db.create_all()
+        upgrade_schema()
+        clear_cache()
+        generation = bump_generation()
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return (backup_path.name if backup_path else None), generation
+
+
+def init_app(app):
+    global GENERATION_FILE
+    GENERATION_FILE = sidecar_path(app, 'generation').with_suffix('')
+    _remember_generation()
+    app.before_request(check_generation)
@@ -0,0 +1,194 @@
+"""
+Resumable payment-proof uploads, following the tus 1.0 core protocol.
+
+    POST  /api/uploads         Upload-Length, Upload-Metadata -> 201, Location
+    HEAD  /api/uploads/<id>    -> Upload-Offset, Upload-Length
+    PATCH /api/uploads/<id>    Upload-Offset + application/offset+octet-stream
+                               -> 204, new Upload-Offset
+
+Chunks are streamed from the request straight onto the end of a partial
+file under uploads/.partial/, so a request only lasts as long as one chunk
+and a dropped connection costs only the chunk in flight: the client asks
+for the offset with HEAD and carries on from there. The partial file's size
+is the offset, and the upload's metadata lives in a JSON file beside it, so
+appending a chunk never touches the database. Once the last byte arrives the
+file is moved into content-addressed storage (app/storage.py) and the
+registration form refers to it with payment_proof_upload_id.
+"""
+import base64
+import binascii
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+
+import click
+
+from app.config import Config
+from app.models import db
+from app.storage import CHUNK_SIZE, store_stream
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = '1.0.0'
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """A rejected upload request; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _partial_dir():
+    return Path(Config.UPLOAD_FOLDER) / '.partial'
+
+
+def _paths(upload_id):
+    if not UPLOAD_ID.match(upload_id or ''):
+        raise UploadError('Upload not found', 404)
+    base = _partial_dir() / upload_id
+    return base, base.with_suffix('.json')
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = meta_path.with_suffix('.json.tmp')
+    tmp_path.write_text(json.dumps(meta))
+    os.replace(tmp_path, meta_path)
+
+
+def parse_metadata(header):
+    """'filename ZmlsZS5wbmc=,filetype aW1hZ2UvcG5n' -> {'filename': 'file.png', 'filetype': 'image/png'}"""
+    metadata = {}
+    for item in filter(None, (part.strip() for part in (header or '').split(','))):
+        key, _, value = item.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except (binascii.Error, UnicodeDecodeError):
+            raise UploadError(f'Invalid Upload-Metadata value for {key}')
+    return metadata
+
+
+def create_upload(length, filename, content_type=None):
+    """Start an upload of length bytes and return its metadata"""
+    if length <= 0:
+        raise UploadError('Upload-Length must be a positive number of bytes')
+    if length > Config.MAX_CONTENT_LENGTH:
+        raise UploadError(f'Uploads are limited to {Config.MAX_CONTENT_LENGTH // (1024 * 1024)} MB', 413)
+
+    _partial_dir().mkdir(parents=True, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    data_path, meta_path = _paths(upload_id)
+    data_path.touch()
+    meta = {
+        'id': upload_id,
+        'length': length,
+        'filename': filename,
+        'content_type': content_type,
+        'path': None,  # Stored path once complete
+        'created_at': time.time(),
+    }
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def get_upload(upload_id):
+    """Metadata of an upload with its current offset"""
+    data_path, meta_path = _paths(upload_id)
+    try:
+        meta = json.loads(meta_path.read_text())
+    except FileNotFoundError:
+        raise UploadError('Upload not found', 404)
+    meta['offset'] = meta['length'] if meta['path'] else data_path.stat().st_size
+    return meta
+
+
+def append_chunk(upload_id, offset, stream, chunk_length):
+    """Append one PATCH body at offset and return the new offset.
+
+    The body is copied to disk as it is read. When the upload is complete it
+    is moved into content-addressed storage and committed.
+    """
+    data_path, meta_path = _paths(upload_id)
+    try:
+        fd = os.open(str(data_path), os.O_WRONLY | os.O_APPEND)
+    except FileNotFoundError:
+        if meta_path.exists():
+            raise UploadError('Upload is already complete', 409)
+        raise UploadError('Upload not found', 404)
+
+    with os.fdopen(fd, 'ab') as f:
+        # One writer per upload; a retry racing a stalled request waits for it
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        meta = json.loads(meta_path.read_text())
+        current = os.fstat(fd).st_size
+        if offset != current:
+            raise UploadError(f'Upload-Offset {offset} does not match the current offset {current}', 409)
+        if chunk_length is not None and current + chunk_length > meta['length']:
+            raise UploadError('Chunk goes past Upload-Length', 413)
+
+        remaining = meta['length'] - current
+        try:
+            while remaining > 0:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk)
+        finally:
+            # Keep whatever arrived before a dropped connection; HEAD reports it
+            f.flush()
+        offset = meta['length'] - remaining
+
+        if remaining == 0:
+            _complete(data_path, meta_path, meta)
+    return offset
+
+
+def _complete(data_path, meta_path, meta):
+    with open(data_path, 'rb') as f:
+        stored = store_stream(f, meta['filename'], meta['content_type'])
+    db.session.commit()
+    meta['path'] = stored.path
+    _write_meta(meta_path, meta)
+    os.remove(data_path)
+    logger.info("Upload %s complete: %s (%d bytes)", meta['id'], stored.path, meta['length'])
+
+
+def completed_path(upload_id):
+    """Stored path of a finished upload, for the registration that refers to it"""
+    meta = get_upload(upload_id)
+    if not meta['path']:
+        raise UploadError('Payment proof upload is not complete')
+    return meta['path']
+
+
+def prune_uploads(max_age=None):
+    """Remove uploads older than UPLOAD_EXPIRY seconds; stored files stay"""
+    max_age = Config.UPLOAD_EXPIRY if max_age is None else max_age
+    cutoff = time.time() - max_age
+    removed = 0
+    if not _partial_dir().exists():
+        return removed
+    for path in _partial_dir().iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += path.suffix == '.json'
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def init_app(app):
+    @app.cli.command('prune-uploads')
+    def prune_uploads_command():
+        """Remove unfinished and expired resumable uploads."""
+        count = prune_uploads()
+        click.echo(f'Removed {count} uploads')
@@ -2,23 +2,38 @@ from flask import Blueprint, request, jsonify, send_from_directory, current_app,
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash, generate_password_hash
 import os
-import shutil
+import hashlib
+import logging
 from pathlib import Path
-from app.models import db, Team, Member, ProblemStatement, AdminSettings, Admin, TeamLogin, Review, Sponsor
+from app.models import db, Team, Member, ProblemStatement, AdminSettings, Admin, TeamLogin, Review, Sponsor, RegistrationTicket
 from app.config import Config
+from app.restore import restore_database, RestoreError, read_generation, database_path
+from app.storage import store_upload, delete_stored
+from app.delivery import deliver_file
+from app.thumbnails import schedule_thumbnail, thumbnail_url
+from app.metrics import track_email
+from app import profiling, admission
+from app.sync import current_cursor, parse_cursor, team_changes
+from app.conditional import conditional_get, table_versions
+from app.cache import cached, get_cache, clear_cache
+from app.json_provider import dumps as json_dumps
+from app.intake import RegistrationError, check_unique, enqueue, ensure_writer, notify
+from app.selection import SelectionError, select_statement, release_statement
+from app import resumable, availability
+from app.resumable import UploadError
 from datetime import datetime
+from importlib.util import find_spec
 import io
 import base64
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-try:
-    from openpyxl import Workbook
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
+
+# openpyxl is only imported when a review export is requested
+OPENPYXL_AVAILABLE = find_spec('openpyxl') is not None
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
+logger = logging.getLogger(__name__)
+
+# Resumable upload protocol headers (app/resumable.py)
+TUS_HEADERS = 'Tus-Resumable,Upload-Length,Upload-Offset,Upload-Metadata'
 
 # Add CORS headers
 @api_bp.after_request
@@ -29,8 +44,9 @@ def after_request(response):
         response.headers.add('Access-Control-Allow-Credentials', 'true')
     else:
         response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,X-Admin-Auth')
-    response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+    response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,X-Admin-Auth,' + TUS_HEADERS)
+    response.headers.add('Access-Control-Allow-Methods', 'GET,HEAD,PUT,POST,PATCH,DELETE,OPTIONS')
+    response.headers.add('Access-Control-Expose-Headers', 'Location,' + TUS_HEADERS)
     return response
 
 # Handle CORS preflight requests
@@ -39,19 +55,23 @@ def handle_preflight():
     if request.method == "OPTIONS":
         response = make_response()
         response.headers.add("Access-Control-Allow-Origin", "*")
-        response.headers.add('Access-Control-Allow-Headers', "Content-Type,Authorization")
-        response.headers.add('Access-Control-Allow-Methods', "GET,PUT,POST,DELETE,OPTIONS")
+        response.headers.add('Access-Control-Allow-Headers', "Content-Type,Authorization," + TUS_HEADERS)
+        response.headers.add('Access-Control-Allow-Methods', "GET,HEAD,PUT,POST,PATCH,DELETE,OPTIONS")
         return response
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
+@track_email
 def send_credentials_email(receiver_email, team_name, username, password, team_lead_name):
     """Send login credentials to team lead via email using SMTP with multiple connection methods"""
     import socket
     import time
     import ssl
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
     
     # Get email configuration from Config
     sender_email = Config.SENDER_EMAIL
@@ -61,7 +81,7 @@ def send_credentials_email(receiver_email, team_name, username, password, team_l
     
     # Check if email credentials are configured
     if not sender_email or not sender_password:
-        print("Email credentials not configured - cannot send email")
+        logger.warning("Email credentials not configured - cannot send email")
         return False
     
     # Create message
@@ -124,7 +144,7 @@ Hogwarts Hackathon Team"""
         for attempt in range(1, max_retries_per_method + 1):
             server = None
             try:
-                print(f"Attempting {method['name']} (attempt {attempt}/{max_retries_per_method}) to send email to {receiver_email}")
+                logger.info("Attempting %s (attempt %d/%d) to send email to %s", method['name'], attempt, max_retries_per_method, receiver_email)
                 
                 # Set socket timeout
                 socket.setdefaulttimeout(20)  # 20 second timeout for SMTP operations
@@ -151,13 +171,11 @@ Hogwarts Hackathon Team"""
                 server.quit()
                 server = None
                 
-                print(f"✓ Email sent successfully to {receiver_email} using {method['name']}")
+                logger.info("Email sent successfully to %s using %s", receiver_email, method['name'])
                 return True
                 
             except smtplib.SMTPAuthenticationError as e:
-                error_msg = f"SMTP Authentication Error: {e}"
-                print(error_msg)
-                print("Check if SENDER_EMAIL and SENDER_PASSWORD are correct")
+                logger.error("SMTP Authentication Error: %s - check if SENDER_EMAIL and SENDER_PASSWORD are correct", e)
                 if server:
                     try:
                         server.quit()
@@ -167,76 +185,92 @@ Hogwarts Hackathon Team"""
                 break
                 
             except (smtplib.SMTPConnectError, ConnectionRefusedError, OSError) as e:
-                error_msg = f"SMTP Connection Error ({method['name']}, attempt {attempt}): {e}"
-                print(error_msg)
+                logger.warning("SMTP Connection Error (%s, attempt %d): %s", method['name'], attempt, e)
                 if server:
                     try:
                         server.quit()
                     except:
                         pass
                 if attempt < max_retries_per_method:
-                    print(f"Retrying {method['name']} in 2 seconds...")
+                    logger.info("Retrying %s in 2 seconds...", method['name'])
                     time.sleep(2)
                 else:
-                    print(f"Failed with {method['name']}, trying next method...")
+                    logger.warning("Failed with %s, trying next method...", method['name'])
                     break
                     
             except socket.timeout as e:
-                error_msg = f"SMTP Timeout Error ({method['name']}, attempt {attempt}): {e}"
-                print(error_msg)
+                logger.warning("SMTP Timeout Error (%s, attempt %d): %s", method['name'], attempt, e)
                 if server:
                     try:
                         server.quit()
                     except:
                         pass
                 if attempt < max_retries_per_method:
-                    print(f"Retrying {method['name']} in 2 seconds...")
+                    logger.info("Retrying %s in 2 seconds...", method['name'])
                     time.sleep(2)
                 else:
-                    print(f"Timeout with {method['name']}, trying next method...")
+                    logger.warning("Timeout with %s, trying next method...", method['name'])
                     break
                     
             except smtplib.SMTPException as e:
-                error_msg = f"SMTP Error ({method['name']}, attempt {attempt}): {e}"
-                print(error_msg)
+                logger.warning("SMTP Error (%s, attempt %d): %s", method['name'], attempt, e)
                 if server:
                     try:
                         server.quit()
                     except:
                         pass
                 if attempt < max_retries_per_method:
-                    print(f"Retrying {method['name']} in 2 seconds...")
+                    logger.info("Retrying %s in 2 seconds...", method['name'])
                     time.sleep(2)
                 else:
-                    print(f"Failed with {method['name']}, trying next method...")
+                    logger.warning("Failed with %s, trying next method...", method['name'])
                     break
                     
             except Exception as e:
-                import traceback
-                error_msg = f"Unexpected error ({method['name']}, attempt {attempt}): {e}"
-                print(error_msg)
-                print(f"Traceback: {traceback.format_exc()}")
+                logger.exception("Unexpected error (%s, attempt %d): %s", method['name'], attempt, e)
                 if server:
                     try:
                         server.quit()
                     except:
                         pass
                 if attempt < max_retries_per_method:
-                    print(f"Retrying {method['name']} in 2 seconds...")
+                    logger.info("Retrying %s in 2 seconds...", method['name'])
                     time.sleep(2)
                 else:
-                    print(f"Failed with {method['name']}, trying next method...")
+                    logger.warning("Failed with %s, trying next method...", method['name'])
                     break
     
-    print(f"✗ Failed to send email to {receiver_email} after trying all connection methods")
+    logger.error("Failed to send email to %s after trying all connection methods", receiver_email)
     return False
 
+def get_setting(key):
+    """AdminSettings value through the cache, or None if the row does not exist"""
+    def load():
+        setting = AdminSettings.query.filter_by(key=key).first()
+        return setting.value if setting else None
+    return cached(f'setting:{key}', load, tags=['admin_settings'])
+
+def setting_enabled(key, create_default=False):
+    """Whether a toggle is 'true'; create_default stores a missing toggle as disabled"""
+    value = get_setting(key)
+    if value is None and create_default:
+        db.session.add(AdminSettings(key=key, value='false'))
+        db.session.commit()
+    return (value or '').lower() == 'true'
+
+def sponsor_list():
+    """Serialized sponsors in display order, through the cache"""
+    def load():
+        sponsors = Sponsor.query.order_by(Sponsor.display_order, Sponsor.created_at).all()
+        return [sponsor.to_dict() for sponsor in sponsors]
+    return cached('sponsors', load, tags=['sponsors'])
+
 @api_bp.route('/register', methods=['POST'])
 def register_team():
+    """Validate a registration and queue it for the writer (see app/intake.py)"""
     try:
         # Check if registration is enabled
-        setting = AdminSettings.query.filter_by(key='registration_enabled').first()
-        if not setting or setting.value.lower() != 'true':
+        if not setting_enabled('registration_enabled'):
             return jsonify({'error': 'Registrations are currently closed'}), 403
         
         # Get form data
@@ -258,38 +292,6 @@ def register_team():
         if not utr_transaction_id:
             return jsonify({'error': 'UTR/Transaction ID is required'}), 400
         
-        # Check if team name already exists (case-insensitive)
-        existing_team = Team.query.filter(
-            db.func.lower(Team.team_name) == db.func.lower(team_name)
-        ).first()
-        if existing_team:
-            return jsonify({'error': 'Team name already exists'}), 400
-        
-        # Handle file upload
-        payment_proof_path = None
-        if 'payment_proof' in request.files:
-            file = request.files['payment_proof']
-            if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                # Create unique filename with timestamp
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"{timestamp}_{filename}"
-                filepath = Path(Config.UPLOAD_FOLDER) / filename
-                file.save(str(filepath))
-                payment_proof_path = f"uploads/{filename}"
-        
-        # Create team with pending approval status
-        team = Team(
-            team_name=team_name,
-            house=house.capitalize(),
-            team_size=team_size,
-            utr_transaction_id=utr_transaction_id,
-            payment_proof_path=payment_proof_path,
-            approval_status='pending'  # Explicitly set to pending
-        )
-        db.session.add(team)
-        db.session.flush()  # Get team ID
-        
         # Get member data from form
         members_data = []
         for i in range(1, team_size + 1):
@@ -299,60 +301,163 @@ def register_team():
             college_name = request.form.get(f'member_{i}_college', '').strip()
             
             if not name or not email or not phone or not college_name:
-                db.session.rollback()
                 return jsonify({'error': f'All fields including college name are required for member {i}'}), 400
-            
-            # Check for duplicate emails
-            existing_member = Member.query.filter_by(email=email).first()
-            if existing_member:
-                db.session.rollback()
-                return jsonify({'error': f'Email {email} is already registered'}), 400
-            
-            member = Member(
-                team_id=team.id,
-                name=name,
-                email=email,
-                phone=phone,
-                college_name=college_name,
-                is_leader=(i == 1),
-                member_order=i
-            )
-            db.session.add(member)
-            members_data.append(member)
+            members_data.append({'name': name, 'email': email, 'phone': phone, 'college_name': college_name})
+        
+        # Quick answer for names and emails that are already taken; the writer checks again
+        try:
+            check_unique(team_name, [member['email'] for member in members_data])
+        except RegistrationError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Commit all changes to database - this ensures data is stored
+        # Handle file upload: a finished resumable upload, or the file in this form
+        payment_proof_path = None
+        upload_id = request.form.get('payment_proof_upload_id', '').strip()
+        if upload_id:
+            try:
+                payment_proof_path = resumable.completed_path(upload_id)
+            except UploadError as e:
+                return jsonify({'error': str(e)}), 400
+        elif 'payment_proof' in request.files:
+            file = request.files['payment_proof']
+            if file and file.filename and allowed_file(file.filename):
+                # Content-addressed storage - identical uploads share one file
+                payment_proof_path = store_upload(file).path
+        
+        # Queue the registration together with the proof's StoredFile row
+        ticket = enqueue({
+            'team_name': team_name,
+            'house': house.capitalize(),
+            'team_size': team_size,
+            'utr_transaction_id': utr_transaction_id,
+            'payment_proof_path': payment_proof_path,
+            'members': members_data
+        })
         try:
             db.session.commit()
         except Exception as commit_error:
             db.session.rollback()
             return jsonify({'error': f'Failed to save data: {str(commit_error)}'}), 500
+        ensure_writer()
+        notify()
         
-        # Verify data was saved by querying it back
-        saved_team = Team.query.get(team.id)
-        if not saved_team:
-            return jsonify({'error': 'Registration failed - data not saved'}), 500
-        
-        # Only return success after confirming data is in database
-        response_data = {
+        response = jsonify({
             'success': True,
-            'message': 'Team registered successfully',
-            'team_id': team.id,
-            'team': team.to_dict()
-        }
-        response = jsonify(response_data)
-        response.status_code = 201
+            'message': 'Registration received',
+            'ticket_id': ticket.id,
+            'status': ticket.status,
+            'status_url': f'/api/register/{ticket.id}'
+        })
+        response.status_code = 202
+        response.headers['Location'] = f'/api/register/{ticket.id}'
         return response
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/availability', methods=['GET'])
+def check_availability():
+    """Whether a team name and member emails are free, from the in-memory index (app/availability.py)"""
+    try:
+        team_name = request.args.get('team_name')
+        emails = request.args.getlist('email')[:4]
+        if team_name is None and not emails:
+            return jsonify({'error': 'Pass team_name and/or email'}), 400
+        
+        result = availability.check(team_name, emails)
+        response = jsonify({'success': True, **result})
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def tus_response(status, **headers):
+    response = make_response('', status)
+    response.headers['Tus-Resumable'] = resumable.TUS_VERSION
+    response.headers['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response.headers[name.replace('_', '-')] = str(value)
+    return response
+
+@api_bp.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable payment proof upload (Upload-Length, Upload-Metadata: filename, filetype)"""
+    try:
+        if not setting_enabled('registration_enabled'):
+            return jsonify({'error': 'Registrations are currently closed'}), 403
+        
+        length = request.headers.get('Upload-Length', type=int)
+        if length is None:
+            return jsonify({'error': 'Upload-Length is required'}), 400
+        metadata = resumable.parse_metadata(request.headers.get('Upload-Metadata'))
+        filename = metadata.get('filename', '')
+        if not allowed_file(filename):
+            return jsonify({'error': 'File type not allowed'}), 400
+        
+        upload = resumable.create_upload(length, filename, metadata.get('filetype') or None)
+        location = f"/api/uploads/{upload['id']}"
+        return tus_response(201, Location=location, Upload_Offset=0)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/uploads/<upload_id>', methods=['HEAD'])
+def upload_offset(upload_id):
+    """Where to resume: the bytes received so far"""
+    try:
+        upload = resumable.get_upload(upload_id)
+    except UploadError as e:
+        return tus_response(e.status)
+    return tus_response(200, Upload_Offset=upload['offset'], Upload_Length=upload['length'])
+
+@api_bp.route('/uploads/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    """Append a chunk at Upload-Offset; the body is streamed to disk"""
+    try:
+        if request.mimetype != 'application/offset+octet-stream':
+            return jsonify({'error': 'Content-Type must be application/offset+octet-stream'}), 415
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            return jsonify({'error': 'Upload-Offset is required'}), 400
+        
+        offset = resumable.append_chunk(upload_id, offset, request.stream, request.content_length)
+        return tus_response(204, Upload_Offset=offset)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/register/<ticket_id>', methods=['GET'])
+def registration_status(ticket_id):
+    """Status of a queued registration: queued, accepted (with the team) or rejected (with the reason)"""
+    try:
+        ticket = db.session.get(RegistrationTicket, ticket_id)
+        if not ticket:
+            return jsonify({'error': 'Registration ticket not found'}), 404
+        if ticket.status == 'queued':
+            # Make sure this process can drain the queue if no writer is running yet
+            ensure_writer()
+        
+        data = {'success': True, **ticket.to_dict()}
+        if ticket.status == 'accepted':
+            team = db.session.get(Team, ticket.team_id)
+            data['team'] = team.to_dict() if team else None
+        response = jsonify(data)
+        if ticket.status == 'queued':
+            response.headers['Retry-After'] = '1'
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/teams', methods=['GET'])
+@conditional_get('teams', 'members', 'admin_settings')
 def get_teams():
     try:
         # Check if teams page is enabled
-        setting = AdminSettings.query.filter_by(key='teams_enabled').first()
-        if not setting or setting.value.lower() != 'true':
+        if not setting_enabled('teams_enabled'):
             return jsonify({
                 'success': False,
                 'error': 'Teams page is currently disabled',
@@ -362,8 +467,8 @@ def get_teams():
         house_filter = request.args.get('house', '').strip()
         search_term = request.args.get('search', '').strip()
         
-        # Build query
-        query = Team.query
+        # Build query; the summaries list members, so load them in one go
+        query = Team.query.options(db.selectinload(Team.members))
         
         # Apply house filter
         if house_filter:
@@ -382,9 +487,7 @@ def get_teams():
                 # Use to_dict_summary which has built-in safety
                 teams_data.append(team.to_dict_summary())
             except Exception as e:
-                import traceback
-                print(f"Error serializing team {team.id}: {e}")
-                print(traceback.format_exc())
+                logger.exception("Error serializing team %s", team.id)
                 # Fallback to basic data if serialization fails
                 try:
                     # Get members safely
@@ -415,9 +518,7 @@ def get_teams():
                         'approval_status': team.approval_status
                     })
                 except Exception as e2:
-                    import traceback
-                    print(f"Error in fallback serialization for team {team.id}: {e2}")
-                    print(traceback.format_exc())
+                    logger.exception("Error in fallback serialization for team %s", team.id)
                     continue
         
         return jsonify({
@@ -426,12 +527,11 @@ def get_teams():
         }), 200
         
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error in get_teams: {error_trace}")
-        return jsonify({'error': str(e), 'trace': error_trace}), 500
+        logger.exception("Error in get_teams")
+        return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/teams/<int:team_id>', methods=['GET'])
+@conditional_get('teams', 'members', private=True)
 def get_team(team_id):
     try:
         team = Team.query.get_or_404(team_id)
@@ -443,6 +543,53 @@ def get_team(team_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/teams/<int:team_id>/dashboard', methods=['GET'])
+def get_team_dashboard(team_id):
+    """Everything the team dashboard (index.html) needs in one response"""
+    try:
+        team = Team.query.options(db.selectinload(Team.members)).filter_by(id=team_id).first()
+        if not team:
+            return jsonify({'error': 'Team not found'}), 404
+        
+        # Statements for the team's house or open to all houses, with selection counts
+        query = ProblemStatement.query.filter(
+            db.or_(
+                ProblemStatement.house == team.house,
+                ProblemStatement.house.is_(None)
+            )
+        )
+        statements = statements_with_counts(query)
+        
+        selected_statement = None
+        if team.selected_problem_statement_id:
+            selected_statement = next(
+                (stmt for stmt in statements if stmt['id'] == team.selected_problem_statement_id), None
+            )
+            if selected_statement is None:
+                stmt = ProblemStatement.query.get(team.selected_problem_statement_id)
+                selected_statement = stmt.to_dict() if stmt else None
+        
+        team_dict = team.to_dict()
+        members = team_dict.pop('members')
+        
+        response = jsonify({
+            'success': True,
+            'dashboard': {
+                'team': team_dict,
+                'members': members,
+                'selected_problem_statement': selected_statement,
+                'statements': statements,
+                'ticket_available': team.approval_status == 'approved'
+            }
+        })
+        # The dashboard is re-fetched after every action; unchanged data costs a 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/teams/update-repo', methods=['POST'])
 def update_team_repo():
     """Update git repository URL for a team"""
@@ -494,7 +641,7 @@ def uploaded_file(filepath):
             return jsonify({'error': 'Invalid file path'}), 403
         
         if file_path.exists() and file_path.is_file():
-            return send_file(str(file_path))
+            return deliver_file(file_path)
         else:
             return jsonify({'error': 'File not found'}), 404
     except Exception as e:
@@ -502,15 +649,52 @@ def uploaded_file(filepath):
 
 # ============ ADMIN ROUTES ============
 
+def team_list_sync(query):
+    """
+    Load a team listing in full, or only what changed for ?since=<cursor>.
+    
+    Returns (teams, removed ids or None for a full listing, cursor).
+    Raises ValueError for a malformed cursor.
+    """
+    # Read the cursor first - a write landing in between is sent again next time
+    cursor = current_cursor()
+    query = query.options(db.selectinload(Team.members))
+    since = request.args.get('since', '').strip()
+    version = parse_cursor(since) if since else None
+    if version is None:
+        return query.all(), None, cursor
+    teams, removed = team_changes(query, version)
+    return teams, removed, cursor
+
+def team_list_response(teams_data, removed, cursor):
+    payload = {
+        'success': True,
+        'teams': teams_data,
+        'cursor': cursor,
+        'full': removed is None
+    }
+    if removed is not None:
+        payload['removed'] = removed
+    return jsonify(payload), 200
+
 @api_bp.route('/admin/pending-teams', methods=['GET'])
 def get_pending_teams():
-    """Get all teams with pending approval status"""
+    """Get all teams with pending approval status (?since=<cursor> for changes only)"""
     try:
-        teams = Team.query.filter_by(approval_status='pending').order_by(Team.registered_at.desc()).all()
-        return jsonify({
-            'success': True,
-            'teams': [team.to_dict() for team in teams]
-        }), 200
+        query = Team.query.filter_by(approval_status='pending').order_by(Team.registered_at.desc())
+        try:
+            teams, removed, cursor = team_list_sync(query)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        teams_data = []
+        for team in teams:
+            team_dict = team.to_dict()
+            team_dict['payment_proof_thumbnail'] = thumbnail_url(team.payment_proof_path)
+            if team.payment_proof_path and not team_dict['payment_proof_thumbnail']:
+                # Older uploads - render it for the next load; proofs that failed once are skipped
+                schedule_thumbnail(team.payment_proof_path)
+            teams_data.append(team_dict)
+        return team_list_response(teams_data, removed, cursor)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -563,7 +747,7 @@ def approve_team(team_id):
         email_error = None
         try:
             # Check if email credentials are configured
-            if Config.SENDER_EMAIL and Config.SENDER_PASSWORD:
+            if Config.EMAIL_ENABLED and Config.SENDER_EMAIL and Config.SENDER_PASSWORD:
                 email_sent = send_credentials_email(
                     receiver_email=team_lead.email,
                     team_name=team.team_name,
@@ -574,11 +758,11 @@ def approve_team(team_id):
                 if not email_sent:
                     email_error = "Email sending failed - check server logs for details"
             else:
-                print("Email credentials not configured - skipping email send")
-                email_error = "Email credentials not configured in environment variables"
+                logger.warning("Email disabled or credentials not configured - skipping email send")
+                email_error = "Email is disabled or credentials are not configured in environment variables"
         except Exception as e:
             email_error = str(e)
-            print(f"Email sending failed (non-critical): {email_error}")
+            logger.warning("Email sending failed (non-critical): %s", email_error)
             # Don't fail the approval if email fails
         
         # Build response message
@@ -592,7 +776,7 @@ def approve_team(team_id):
         try:
             team_dict = team.to_dict()
         except Exception as e:
-            print(f"Error serializing team: {e}")
+            logger.exception("Error serializing team %s", team.id)
             # Fallback to basic team data
             team_dict = {
                 'id': team.id,
@@ -614,51 +798,47 @@ def approve_team(team_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error in approve_team: {error_trace}")
-        return jsonify({'error': str(e), 'trace': error_trace}), 500
+        logger.exception("Error in approve_team")
+        return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/admin/reject-team/<int:team_id>', methods=['POST'])
 def reject_team(team_id):
     """Reject a team - deletes the team and all related data from the database"""
-    print(f"=== REJECT TEAM CALLED: Deleting team {team_id} ===")  # Debug log
     try:
         team = Team.query.get_or_404(team_id)
         team_name = team.team_name  # Store name before deletion
-        print(f"Found team: {team_name} (ID: {team_id})")
         
         # Delete related records first (due to foreign key constraints)
         # Delete TeamLogin if it exists
         team_login = TeamLogin.query.filter_by(team_id=team_id).first()
         if team_login:
-            print(f"Deleting TeamLogin for team {team_id}")
             db.session.delete(team_login)
         
         # Delete Review if it exists
         review = Review.query.filter_by(team_id=team_id).first()
         if review:
-            print(f"Deleting Review for team {team_id}")
             db.session.delete(review)
         
         # Delete all members explicitly (cascade should handle this, but being explicit)
         members = Member.query.filter_by(team_id=team_id).all()
-        print(f"Deleting {len(members)} members for team {team_id}")
         for member in members:
             db.session.delete(member)
         
+        # Give its problem statement slot back
+        if team.selected_problem_statement_id:
+            release_statement(team.selected_problem_statement_id)
+        
         # Delete the team (DO NOT SET STATUS - DELETE IT)
-        print(f"Deleting team {team_id} ({team_name})")
         db.session.delete(team)
         
         # Commit all deletions
         db.session.commit()
-        print(f"Successfully deleted team {team_id} from database")
+        logger.info("Rejected and deleted team %s (%s) with %d members", team_id, team_name, len(members))
         
         # Verify deletion
         verify_team = Team.query.get(team_id)
         if verify_team:
-            print(f"ERROR: Team {team_id} still exists after deletion!")
+            logger.error("Team %s still exists after deletion", team_id)
             return jsonify({'error': 'Team still exists after deletion attempt'}), 500
         
         return jsonify({
@@ -668,18 +848,31 @@ def reject_team(team_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"ERROR deleting team {team_id}: {error_trace}")  # Log to console for debugging
+        logger.exception("Error deleting team %s", team_id)
         # Return a more user-friendly error message
         error_msg = str(e)
         if 'foreign key constraint' in error_msg.lower() or 'constraint' in error_msg.lower():
             error_msg = 'Database constraint error. Please ensure all related records are deleted first.'
         elif 'IntegrityError' in str(type(e)):
             error_msg = 'Database integrity error. The team may have related records that prevent deletion.'
-        return jsonify({'error': error_msg, 'trace': error_trace}), 500
+        return jsonify({'error': error_msg}), 500
+
+def statements_with_counts(query):
+    """Serialize problem statements with their selection counts and remaining slots"""
+    statements = query.order_by(ProblemStatement.created_at.desc()).all()
+    return [stmt.to_dict() for stmt in statements]
+
+def parse_capacity(value):
+    """Capacity from a request: None for unlimited, otherwise a non-negative int. Raises ValueError."""
+    if value is None or value == '':
+        return None
+    capacity = int(value)
+    if capacity < 0:
+        raise ValueError('Capacity cannot be negative')
+    return capacity
 
 @api_bp.route('/admin/problem-statements', methods=['GET'])
+@conditional_get('problem_statements', 'teams')
 def get_problem_statements():
     """Get all problem statements"""
     try:
@@ -700,15 +893,7 @@ def get_problem_statements():
         if domain_filter:
             query = query.filter(ProblemStatement.domain == domain_filter)
         
-        statements = query.order_by(ProblemStatement.created_at.desc()).all()
-        
-        # Count teams that selected each statement
-        result = []
-        for stmt in statements:
-            count = Team.query.filter_by(selected_problem_statement_id=stmt.id).count()
-            stmt_dict = stmt.to_dict()
-            stmt_dict['selected_count'] = count
-            result.append(stmt_dict)
+        result = statements_with_counts(query)
         
         return jsonify({
             'success': True,
@@ -732,13 +917,18 @@ def add_problem_statement():
         
         if not title or not description or not domain or not difficulty:
             return jsonify({'error': 'All fields are required'}), 400
+        try:
+            capacity = parse_capacity(data.get('capacity'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Capacity must be a whole number of teams'}), 400
         
         statement = ProblemStatement(
             title=title,
             description=description,
             domain=domain,
             difficulty=difficulty,
-            house=house
+            house=house,
+            capacity=capacity
         )
         db.session.add(statement)
         db.session.commit()
@@ -752,6 +942,29 @@ def add_problem_statement():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/admin/problem-statements/<int:stmt_id>/capacity', methods=['PUT'])
+def update_problem_statement_capacity(stmt_id):
+    """Set how many teams may select a problem statement (null for unlimited)"""
+    try:
+        data = request.get_json() or {}
+        try:
+            capacity = parse_capacity(data.get('capacity'))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Capacity must be a whole number of teams'}), 400
+        
+        statement = ProblemStatement.query.get_or_404(stmt_id)
+        # Lowering it below the teams already in only stops new selections
+        statement.capacity = capacity
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'statement': statement.to_dict()
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/admin/problem-statements/<int:stmt_id>', methods=['DELETE'])
 def delete_problem_statement(stmt_id):
     """Delete a problem statement"""
@@ -772,16 +985,10 @@ def delete_problem_statement(stmt_id):
 def get_login_toggle():
     """Get current login toggle status"""
     try:
-        setting = AdminSettings.query.filter_by(key='login_enabled').first()
-        if not setting:
-            # Default to disabled
-            setting = AdminSettings(key='login_enabled', value='false')
-            db.session.add(setting)
-            db.session.commit()
-        
+        # Polled by every page load; a missing toggle defaults to disabled
         return jsonify({
             'success': True,
-            'enabled': setting.value.lower() == 'true'
+            'enabled': setting_enabled('login_enabled', create_default=True)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -814,16 +1021,10 @@ def toggle_login():
 def get_registration_toggle():
     """Get current registration toggle status"""
     try:
-        setting = AdminSettings.query.filter_by(key='registration_enabled').first()
-        if not setting:
-            # Default to disabled
-            setting = AdminSettings(key='registration_enabled', value='false')
-            db.session.add(setting)
-            db.session.commit()
-        
+        # Polled by every page load; a missing toggle defaults to disabled
         return jsonify({
             'success': True,
-            'enabled': setting.value.lower() == 'true'
+            'enabled': setting_enabled('registration_enabled', create_default=True)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -856,16 +1057,10 @@ def toggle_registration():
 def get_teams_toggle():
     """Get current teams toggle status"""
     try:
-        setting = AdminSettings.query.filter_by(key='teams_enabled').first()
-        if not setting:
-            # Default to disabled
-            setting = AdminSettings(key='teams_enabled', value='false')
-            db.session.add(setting)
-            db.session.commit()
-        
+        # Polled by every page load; a missing toggle defaults to disabled
         return jsonify({
             'success': True,
-            'enabled': setting.value.lower() == 'true'
+            'enabled': setting_enabled('teams_enabled', create_default=True)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -894,6 +1089,103 @@ def toggle_teams():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/admin/profiling', methods=['GET'])
+def get_profiling():
+    """Get request profiling settings and the stored profile dumps (admin only)"""
+    try:
+        is_admin_session = session.get('is_admin', False)
+        admin_header = request.headers.get('X-Admin-Auth', '').lower() == 'true'
+        
+        if not is_admin_session and not admin_header:
+            return jsonify({'error': 'Unauthorized. Please log in as admin first.'}), 401
+        
+        settings = profiling.current_settings()
+        return jsonify({
+            'success': True,
+            'sample_rate': settings['sample_rate'],
+            'routes': sorted(settings['routes']),
+            'profiles': profiling.list_profiles()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/admin/profiling', methods=['POST'])
+def update_profiling():
+    """Enable profiling for 1-in-N requests and/or specific endpoints (admin only)"""
+    try:
+        is_admin_session = session.get('is_admin', False)
+        admin_header = request.headers.get('X-Admin-Auth', '').lower() == 'true'
+        
+        if not is_admin_session and not admin_header:
+            return jsonify({'error': 'Unauthorized. Please log in as admin first.'}), 401
+        
+        data = request.get_json()
+        sample_rate = int(data.get('sample_rate') or 0)
+        routes = ','.join(sorted(profiling.parse_routes(','.join(data.get('routes') or []))))
+        
+        if sample_rate < 0:
+            return jsonify({'error': 'Sample rate must be 0 (off) or a positive N for 1-in-N requests'}), 400
+        
+        for key, value in (('profiling_sample_rate', str(sample_rate)), ('profiling_routes', routes)):
+            setting = AdminSettings.query.filter_by(key=key).first()
+            if not setting:
+                setting = AdminSettings(key=key, value=value)
+                db.session.add(setting)
+            setting.value = value
+        db.session.commit()
+        profiling.invalidate_settings()
+        
+        return jsonify({
+            'success': True,
+            'sample_rate': sample_rate,
+            'routes': routes.split(',') if routes else [],
+            'message': 'Profiling is now ' + ('enabled' if sample_rate or routes else 'disabled')
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/admin/cache', methods=['GET'])
+def get_cache_stats():
+    """Cache backend, hit/miss/eviction counters (this worker) and entry count"""
+    try:
+        return jsonify({
+            'success': True,
+            'cache': get_cache().stats(),
+            'availability': availability.index.stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/admin/admission', methods=['GET'])
+def get_admission_stats():
+    """In-flight API requests per endpoint and the admission limits"""
+    try:
+        return jsonify({
+            'success': True,
+            'admission': admission.stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/admin/cache/clear', methods=['POST'])
+def clear_cache_entries():
+    """Drop every cached entry"""
+    try:
+        is_admin_session = session.get('is_admin', False)
+        admin_header = request.headers.get('X-Admin-Auth', '').lower() == 'true'
+        
+        if not is_admin_session and not admin_header:
+            return jsonify({'error': 'Unauthorized. Please log in as admin first.'}), 401
+        
+        clear_cache()
+        return jsonify({
+            'success': True,
+            'message': 'Cache cleared'
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ============ LOGIN ROUTES ============
 
 @api_bp.route('/login', methods=['POST'])
@@ -992,39 +1284,20 @@ def select_problem_statement():
         if not team_id or not problem_statement_id:
             return jsonify({'error': 'Team ID and Problem Statement ID are required'}), 400
         
-        team = Team.query.get_or_404(team_id)
-        
-        # Check if team is approved
-        if team.approval_status != 'approved':
-            return jsonify({'error': 'Team is not approved yet'}), 403
-        
-        # Check if team has already selected a problem statement - prevent any resubmission
-        if team.selected_problem_statement_id:
-            # Check if trying to select the same statement
-            if team.selected_problem_statement_id == problem_statement_id:
-                return jsonify({'error': 'You have already applied for this problem statement. Resubmission is not allowed.'}), 400
-            # Prevent selecting a different statement - no resubmissions allowed
-            return jsonify({'error': 'You have already applied for a problem statement. Resubmission or changing your selection is not allowed.'}), 400
-        
-        problem_statement = ProblemStatement.query.get_or_404(problem_statement_id)
-        
-        # Update team's selected problem statement
-        team.selected_problem_statement_id = problem_statement_id
-        
-        # If the problem statement's domain is different from team's house, update team's house
-        # Domain values: gryffindor, slytherin, ravenclaw, hufflepuff, muggles
-        # Convert domain to capitalized house name for consistency
-        problem_house = problem_statement.domain.capitalize() if problem_statement.domain else None
-        
-        if problem_house and problem_house.lower() != team.house.lower():
-            team.house = problem_house
-        
-        db.session.commit()
+        # Compare-and-set on the team and the statement's slot count (app/selection.py)
+        try:
+            team, statement = select_statement(team_id, problem_statement_id)
+        except SelectionError as e:
+            error = {'error': str(e)}
+            if e.remaining is not None:
+                error['remaining'] = e.remaining
+            return jsonify(error), e.status
         
         return jsonify({
             'success': True,
             'message': 'Problem statement selected successfully',
-            'team': team.to_dict()
+            'team': team.to_dict(),
+            'remaining': statement.remaining
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -1042,49 +1315,9 @@ def get_all_teams():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@api_bp.route('/generate-ticket/<int:team_id>', methods=['GET'])
-def generate_ticket(team_id):
-    """Generate and return a downloadable ticket for the team"""
-    try:
-        team = Team.query.get_or_404(team_id)
-        
-        # Check if team is approved
-        if team.approval_status != 'approved':
-            return jsonify({'error': 'Team is not approved yet'}), 403
-        
-        # Get team members
-        members = Member.query.filter_by(team_id=team_id).order_by(Member.member_order).all()
-        
-        # Get selected problem statement if any
-        problem_statement = None
-        if team.selected_problem_statement_id:
-            problem_statement = ProblemStatement.query.get(team.selected_problem_statement_id)
-        
-        # Get house crest image and convert to base64
-        house_crests = {
-            'Gryffindor': 'gryffindor.png',
-            'Slytherin': 'slytherin.png',
-            'Ravenclaw': 'ravenclaw.png',
-            'Hufflepuff': 'hufflepuff.png',
-            'Muggles': 'muggles.png'
-        }
-        crest_filename = house_crests.get(team.house, 'muggles.png')
-        crest_path = Config.BASE_DIR / 'assets' / crest_filename
-        
-        # Convert image to base64
-        crest_base64 = ''
-        if crest_path.exists():
-            try:
-                with open(crest_path, 'rb') as img_file:
-                    img_data = img_file.read()
-                    crest_base64 = base64.b64encode(img_data).decode('utf-8')
-                    crest_base64 = f'data:image/png;base64,{crest_base64}'
-            except Exception as e:
-                print(f"Error reading crest image: {e}")
-                crest_base64 = ''
-        
-        # Generate HTML ticket in Hogwarts Express style
-        ticket_html = f"""<!DOCTYPE html>
+def build_ticket_html(team, members, crest_base64):
+    """Build the Hogwarts Express ticket HTML for a team and its ordered members"""
+    ticket_html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -1302,14 +1535,14 @@ def generate_ticket(team_id):
                     <div class="members-list">
                         <strong>Team Members:</strong>
 """
-        
-        for member in members:
-            leader_badge = " (Leader)" if member.is_leader else ""
-            ticket_html += f"""
+    
+    for member in members:
+        leader_badge = " (Leader)" if member.is_leader else ""
+        ticket_html += f"""
                         <div class="member-item">• {member.name}{leader_badge}</div>
 """
-        
-        ticket_html += """
+    
+    ticket_html += """
                     </div>
                 </div>
                 
@@ -1322,6 +1555,51 @@ def generate_ticket(team_id):
 </body>
 </html>
 """
+    return ticket_html
+
+HOUSE_CRESTS = {
+    'Gryffindor': 'gryffindor.png',
+    'Slytherin': 'slytherin.png',
+    'Ravenclaw': 'ravenclaw.png',
+    'Hufflepuff': 'hufflepuff.png',
+    'Muggles': 'muggles.png'
+}
+
+def house_crest_data_uri(house):
+    """House crest image as a base64 data URI ('' if it cannot be read)"""
+    crest_filename = HOUSE_CRESTS.get(house, 'muggles.png')
+    crest_path = Config.BASE_DIR / 'assets' / crest_filename
+    
+    def load():
+        if not crest_path.exists():
+            return ''
+        try:
+            with open(crest_path, 'rb') as img_file:
+                crest_base64 = base64.b64encode(img_file.read()).decode('utf-8')
+            return f'data:image/png;base64,{crest_base64}'
+        except Exception as e:
+            logger.warning("Error reading crest image: %s", e)
+            return ''
+    # Bundled assets only change with a deploy
+    return cached(f'crest:{crest_filename}', load, ttl=86400)
+
+def render_ticket(team):
+    """Ticket HTML for an approved team"""
+    members = Member.query.filter_by(team_id=team.id).order_by(Member.member_order).all()
+    # Generate HTML ticket in Hogwarts Express style
+    return build_ticket_html(team, members, house_crest_data_uri(team.house))
+
+@api_bp.route('/generate-ticket/<int:team_id>', methods=['GET'])
+def generate_ticket(team_id):
+    """Generate and return a downloadable ticket for the team"""
+    try:
+        team = Team.query.get_or_404(team_id)
+        
+        # Check if team is approved
+        if team.approval_status != 'approved':
+            return jsonify({'error': 'Team is not approved yet'}), 403
+        
+        ticket_html = cached(f'ticket:{team_id}', lambda: render_ticket(team), tags=[f'team:{team_id}'])
         
         # Return as downloadable HTML file
         response = make_response(ticket_html)
@@ -1332,42 +1610,96 @@ def generate_ticket(team_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+ADMIN_TOGGLE_KEYS = ('login_enabled', 'registration_enabled', 'teams_enabled')
+# Tables behind the /admin/bootstrap payload
+BOOTSTRAP_TABLES = ('teams', 'members', 'team_logins', 'problem_statements', 'sponsors', 'admin_settings')
+STATISTICS_HOUSES = ['gryffindor', 'slytherin', 'ravenclaw', 'hufflepuff', 'muggles']
+
+def collect_statistics():
+    """Total members, total teams and team counts by house (case-insensitive), through the cache"""
+    def load():
+        total_members = db.session.query(db.func.count(Member.id)).scalar() or 0
+        rows = db.session.query(
+            db.func.lower(Team.house), db.func.count(Team.id)
+        ).group_by(db.func.lower(Team.house)).all()
+        by_house = dict(rows)
+        return {
+            'total_members': total_members,
+            'total_teams': sum(by_house.values()),
+            'by_domain': {house: by_house.get(house, 0) for house in STATISTICS_HOUSES}
+        }
+    return cached('statistics', load, tags=['teams', 'members'])
+
+def warm_caches():
+    """Load the toggles, sponsors, statistics, house crests and availability index.
+
+    Called from the gunicorn when_ready hook so the first requests after a
+    deploy do not all miss at once. Needs an app context.
+    """
+    for key in ADMIN_TOGGLE_KEYS:
+        get_setting(key)
+    sponsor_list()
+    collect_statistics()
+    for house in HOUSE_CRESTS:
+        house_crest_data_uri(house)
+    availability.warm()
+
 @api_bp.route('/admin/statistics', methods=['GET'])
 def get_statistics():
     """Get accurate statistics: total members, total teams, and counts by domain"""
     try:
-        from sqlalchemy import func
-        
-        # Total members count (all members across all teams)
-        total_members = db.session.query(func.count(Member.id)).scalar() or 0
-        
-        # Total teams count (all teams, regardless of approval status)
-        total_teams = db.session.query(func.count(Team.id)).scalar() or 0
-        
-        # Count teams by their house (case-insensitive using SQL)
-        domain_counts = {}
-        houses = ['gryffindor', 'slytherin', 'ravenclaw', 'hufflepuff', 'muggles']
-        
-        for house in houses:
-            # Use case-insensitive comparison with func.lower()
-            count = db.session.query(func.count(Team.id)).filter(
-                db.func.lower(Team.house) == house
-            ).scalar() or 0
-            domain_counts[house] = count
-        
         return jsonify({
             'success': True,
-            'statistics': {
-                'total_members': total_members,
-                'total_teams': total_teams,
-                'by_domain': domain_counts
-            }
+            'statistics': collect_statistics()
         }), 200
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error in get_statistics: {error_trace}")
-        return jsonify({'error': str(e), 'trace': error_trace}), 500
+        logger.exception("Error in get_statistics")
+        return jsonify({'error': str(e)}), 500
+
+def admin_data_version():
+    """
+    Composite version of everything /admin/bootstrap returns.
+    
+    Built from the per-table write counters (app/conditional.py) and the
+    database generation, so any flush that touches teams, members, problem
+    statements, sponsors or settings - including capacity and sponsor
+    edits - produces a different version.
+    """
+    versions = table_versions(*BOOTSTRAP_TABLES)
+    
+    settings = AdminSettings.query.filter(AdminSettings.key.in_(ADMIN_TOGGLE_KEYS)).all()
+    toggles = {key: False for key in ADMIN_TOGGLE_KEYS}
+    for setting in settings:
+        toggles[setting.key] = (setting.value or '').lower() == 'true'
+    
+    parts = (read_generation(), sorted((name, version) for name, (version, _) in versions.items()), sorted(toggles.items()))
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return digest, toggles
+
+@api_bp.route('/admin/bootstrap', methods=['GET'])
+def get_admin_bootstrap():
+    """Statistics, toggles, problem statements and sponsors for admin.html in one response"""
+    try:
+        version, toggles = admin_data_version()
+        
+        # Auto-refreshes with an unchanged version skip building the payload
+        if version in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = jsonify({
+                'success': True,
+                'version': version,
+                'statistics': collect_statistics(),
+                'toggles': {key[:-len('_enabled')]: value for key, value in toggles.items()},
+                'statements': statements_with_counts(ProblemStatement.query),
+                'sponsors': sponsor_list()
+            })
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        logger.exception("Error in get_admin_bootstrap")
+        return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/admin/download-database', methods=['GET'])
 def download_database():
@@ -1377,7 +1709,7 @@ def download_database():
         # For now, we'll allow this endpoint but it should be protected by admin authentication
         # You can add proper admin session checking here
         
-        db_path = Config.DATABASE_PATH
+        db_path = database_path()
         
         if not db_path.exists():
             return jsonify({'error': 'Database file not found'}), 404
@@ -1390,9 +1722,7 @@ def download_database():
             download_name='hogwarts_hackathon.db'
         )
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error downloading database: {error_trace}")
+        logger.exception("Error downloading database")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/admin/upload-database', methods=['POST'])
@@ -1419,67 +1749,47 @@ def upload_database():
         if not file.filename.endswith('.db'):
             return jsonify({'error': 'Invalid file type. Please upload a .db file'}), 400
         
-        db_path = Config.DATABASE_PATH
-        
-        # Create backup of current database before overwriting (optional safety measure)
-        backup_path = None
-        if db_path.exists():
-            try:
-                backup_path = db_path.parent / f'hogwarts_hackathon_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
-                shutil.copy2(str(db_path), str(backup_path))
-                print(f"Backup created: {backup_path}")
-            except Exception as backup_error:
-                print(f"Warning: Could not create backup: {backup_error}")
-                # Continue anyway - user has been warned
-        
-        # Close any existing database connections and remove all connections from the engine
+        # Stream to a temp file, validate it and swap it in atomically.
+        # Other workers pick up the new file through the generation counter.
         try:
-            db.session.close()
-            if hasattr(db, 'engine'):
-                db.engine.dispose()
-        except Exception as close_error:
-            print(f"Warning: Error closing database connections: {close_error}")
+            backup_name, generation = restore_database(file.stream)
+        except RestoreError as e:
+            return jsonify({'error': f'Invalid database file: {e}'}), 400
         
-        # Save the uploaded file, overwriting the current database
-        file.save(str(db_path))
-        
-        print(f"Database uploaded and overwritten: {db_path}")
+        logger.info("Database restored: %s (generation %d)", database_path(), generation)
         
         return jsonify({
             'success': True,
             'message': 'Database uploaded and overwritten successfully',
-            'backup_created': backup_path.name if backup_path and backup_path.exists() else None
+            'backup_created': backup_name
         }), 200
         
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error uploading database: {error_trace}")
+        logger.exception("Error uploading database")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/admin/all-teams', methods=['GET'])
 def get_all_teams_with_members():
-    """Get all approved teams with full member details for management"""
+    """Get all approved teams with full member details for management (?since=<cursor> for changes only)"""
     try:
         # Only get approved teams
-        teams = Team.query.filter_by(approval_status='approved').order_by(Team.team_name).all()
+        query = Team.query.filter_by(approval_status='approved').order_by(Team.team_name)
+        try:
+            teams, removed, cursor = team_list_sync(query)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         teams_data = []
         for team in teams:
             try:
                 teams_data.append(team.to_dict())
             except Exception as e:
-                print(f"Error serializing team {team.id}: {e}")
+                logger.exception("Error serializing team %s", team.id)
                 continue
         
-        return jsonify({
-            'success': True,
-            'teams': teams_data
-        }), 200
+        return team_list_response(teams_data, removed, cursor)
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error in get_all_teams_with_members: {error_trace}")
-        return jsonify({'error': str(e), 'trace': error_trace}), 500
+        logger.exception("Error in get_all_teams_with_members")
+        return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/admin/teams/<int:team_id>/members', methods=['POST'])
 def add_team_member(team_id):
@@ -1584,7 +1894,6 @@ def remove_team_member(team_id, member_id):
 def add_review_marks():
     """Add or update review marks for a team - stores all reviews in one row"""
     try:
-        import json
         data = request.get_json()
         team_id = data.get('team_id')
         review_number = data.get('review_number')
@@ -1617,7 +1926,7 @@ def add_review_marks():
             'feedback': feedback,
             'criteria': criteria
         }
-        review_data_json = json.dumps(review_data)
+        review_data_json = json_dumps(review_data)
         
         if review:
             # Update existing review row
@@ -1650,40 +1959,41 @@ def add_review_marks():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def review_export_payload(reviews):
+    """JSON form of the review export, used when openpyxl is not installed"""
+    review_data = {1: [], 2: [], 3: []}
+    for review in reviews:
+        for review_num in [1, 2, 3]:
+            review_info = review.get_review(review_num)
+            if review_info and review_info.get('marks', 0) > 0:
+                review_data[review_num].append({
+                    'team_id': review.team_id,
+                    'team_name': review.team.team_name,
+                    'house': review.team.house,
+                    'review_number': review_num,
+                    'total_marks': review_info.get('marks', 0),
+                    'feedback': review_info.get('feedback', ''),
+                    'criteria': review_info.get('criteria', [])
+                })
+    return {
+        'success': True,
+        'data': review_data
+    }
+
 @api_bp.route('/admin/review-marks/export', methods=['GET'])
 def export_review_marks():
     """Export all review marks as Excel file with 3 sheets (Review 1, 2, 3)"""
     try:
-        import json
-        
         if not OPENPYXL_AVAILABLE:
             # Fallback to JSON if openpyxl not available
             reviews = Review.query.join(Team).filter(Team.approval_status == 'approved').order_by(Team.team_name).all()
-            review_data = {1: [], 2: [], 3: []}
-            
-            for review in reviews:
-                for review_num in [1, 2, 3]:
-                    review_info = review.get_review(review_num)
-                    if review_info and review_info.get('marks', 0) > 0:
-                        review_data[review_num].append({
-                            'team_id': review.team_id,
-                            'team_name': review.team.team_name,
-                            'house': review.team.house,
-                            'review_number': review_num,
-                            'total_marks': review_info.get('marks', 0),
-                            'feedback': review_info.get('feedback', ''),
-                            'criteria': review_info.get('criteria', [])
-                        })
-            
-            return jsonify({
-                'success': True,
-                'data': review_data
-            }), 200
+            return jsonify(review_export_payload(reviews)), 200
         
         # Get all reviews with team information (one row per team now)
         reviews = Review.query.join(Team).filter(Team.approval_status == 'approved').order_by(Team.team_name).all()
         
         # Create Excel workbook
+        from openpyxl import Workbook
         wb = Workbook()
         wb.remove(wb.active)  # Remove default sheet
         
@@ -1768,10 +2078,9 @@ def export_review_marks():
 def get_sponsors():
     """Get all sponsors"""
     try:
-        sponsors = Sponsor.query.order_by(Sponsor.display_order, Sponsor.created_at).all()
         return jsonify({
             'success': True,
-            'sponsors': [sponsor.to_dict() for sponsor in sponsors]
+            'sponsors': sponsor_list()
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1786,8 +2095,7 @@ def add_sponsor():
         admin_header = request.headers.get('X-Admin-Auth', '').lower() == 'true'
         
         if not is_admin_session and not admin_header:
-            # Debug: log session info
-            print(f"Session check failed. Session keys: {list(session.keys())}, is_admin: {is_admin_session}, header: {admin_header}")
+            logger.info("Admin check failed for add_sponsor (session keys: %s)", list(session.keys()))
             return jsonify({'error': 'Unauthorized. Please log in as admin first.'}), 401
         
         # Get form data (for file uploads, use form data, not JSON)
@@ -1803,15 +2111,7 @@ def add_sponsor():
         if 'logo' in request.files:
             file = request.files['logo']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                # Add timestamp to avoid conflicts
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                filename = timestamp + filename
-                sponsors_dir = Config.UPLOAD_FOLDER / 'sponsors'
-                sponsors_dir.mkdir(parents=True, exist_ok=True)
-                file_path = sponsors_dir / filename
-                file.save(str(file_path))
-                logo_path = f'uploads/sponsors/{filename}'
+                logo_path = store_upload(file, namespace='sponsors').path
             else:
                 return jsonify({'error': 'Invalid logo file. Please upload a valid image file (PNG, JPG, JPEG, GIF)'}), 400
         else:
@@ -1838,9 +2138,7 @@ def add_sponsor():
         
     except Exception as e:
         db.session.rollback()
-        import traceback
-        print(f"Error adding sponsor: {e}")
-        print(traceback.format_exc())
+        logger.exception("Error adding sponsor")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/admin/sponsors/<int:sponsor_id>', methods=['DELETE'])
@@ -1852,21 +2150,20 @@ def delete_sponsor(sponsor_id):
             return jsonify({'error': 'Unauthorized'}), 401
         
         sponsor = Sponsor.query.get_or_404(sponsor_id)
-        
-        # Delete logo file if it exists
-        if sponsor.logo_path:
-            # Construct full path - logo_path is stored as 'uploads/sponsors/filename.jpg'
-            logo_full_path = Config.BASE_DIR / sponsor.logo_path
-            if logo_full_path.exists():
-                try:
-                    os.remove(str(logo_full_path))
-                except Exception as e:
-                    print(f"Warning: Could not delete logo file {logo_full_path}: {e}")
-                    pass
+        logo_path = sponsor.logo_path
         
         db.session.delete(sponsor)
         db.session.commit()
         
+        # Delete the logo file unless another sponsor shares the same content
+        if logo_path and logo_path.startswith('uploads/'):
+            try:
+                delete_stored(logo_path)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning("Could not delete logo file %s: %s", logo_path, e)
+        
         return jsonify({
             'success': True,
             'message': 'Sponsor deleted successfully'
@@ -1877,13 +2174,13 @@ def delete_sponsor(sponsor_id):
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/sponsors', methods=['GET'])
+@conditional_get('sponsors', max_age=60)
 def get_public_sponsors():
     """Get all sponsors for public display"""
     try:
-        sponsors = Sponsor.query.order_by(Sponsor.display_order, Sponsor.created_at).all()
         return jsonify({
             'success': True,
-            'sponsors': [sponsor.to_dict() for sponsor in sponsors]
+            'sponsors': sponsor_list()
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,123 @@
+"""
+Problem statement selection with per-statement capacity.
+
+A selection is two compare-and-set UPDATEs in one short transaction:
+
+    UPDATE teams SET selected_problem_statement_id = :statement
+     WHERE id = :team AND approval_status = 'approved'
+       AND selected_problem_statement_id IS NULL
+
+    UPDATE problem_statements SET selected_count = selected_count + 1
+     WHERE id = :statement AND (capacity IS NULL OR selected_count < capacity)
+
+If either matches no row the transaction is rolled back, so a team holds at
+most one slot and a statement is never booked past its capacity, however
+many teams press the button at once; nobody reads a row and decides in
+Python. Both run before anything is read, so the transaction waits for the
+write lock once, at its start, and holds it for a few statements. selected_count is
+kept by select_statement and release_statement and recounted by
+`flask init-db`. These are Core UPDATEs, which skip the flush hooks, so
+each one bumps the problem_statements table version and cache tag itself.
+"""
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.cache import tag_written
+from app.conditional import bump_table_versions
+from app.models import db, Team, ProblemStatement
+
+
+class SelectionError(Exception):
+    """A selection that was refused; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, remaining=None):
+        super().__init__(message)
+        self.status = status
+        self.remaining = remaining
+
+
+def _statements_written():
+    bump_table_versions(db.session, ['problem_statements'])
+    tag_written(db.session, 'problem_statements')
+
+
+def _refusal(team_id, statement_id):
+    """Why the team's compare-and-set matched no row"""
+    team = db.session.get(Team, team_id)
+    if team is None:
+        return SelectionError('Team not found', 404)
+    if team.approval_status != 'approved':
+        return SelectionError('Team is not approved yet', 403)
+    if team.selected_problem_statement_id == statement_id:
+        return SelectionError('You have already applied for this problem statement. Resubmission is not allowed.')
+    return SelectionError('You have already applied for a problem statement. Resubmission or changing your selection is not allowed.')
+
+
+def select_statement(team_id, statement_id):
+    """Give the team a slot on the statement and commit. Returns (team, statement).
+
+    Raises SelectionError, with remaining=0 when the statement is full.
+    """
+    teams = Team.__table__
+    statements = ProblemStatement.__table__
+    try:
+        # Write before reading anything: a SQLite transaction that has read
+        # cannot wait for the write lock and fails with "database is locked"
+        claimed = db.session.execute(
+            teams.update()
+            .where(teams.c.id == team_id)
+            .where(teams.c.approval_status == 'approved')
+            .where(teams.c.selected_problem_statement_id.is_(None))
+            .values(selected_problem_statement_id=statement_id)
+        ).rowcount
+        if not claimed:
+            raise _refusal(team_id, statement_id)
+
+        booked = db.session.execute(
+            statements.update()
+            .where(statements.c.id == statement_id)
+            .where(db.or_(statements.c.capacity.is_(None), statements.c.selected_count < statements.c.capacity))
+            .values(selected_count=statements.c.selected_count + 1)
+        ).rowcount
+        statement = db.session.get(ProblemStatement, statement_id)
+        if statement is None:
+            raise SelectionError('Problem statement not found', 404)
+        if not booked:
+            raise SelectionError('This problem statement is full. Please choose another one.', 409, remaining=0)
+        _statements_written()
+
+        team = db.session.get(Team, team_id)
+        # Have the flush treat the team as edited, so it stamps row_version
+        # and invalidates the caches as for any other team change
+        flag_modified(team, 'selected_problem_statement_id')
+        # The statement's domain decides the team's house
+        problem_house = statement.domain.capitalize() if statement.domain else None
+        if problem_house and problem_house.lower() != team.house.lower():
+            team.house = problem_house
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    return team, statement
+
+
+def release_statement(statement_id):
+    """Give back the slot of a team that is being deleted; commits with the caller"""
+    statements = ProblemStatement.__table__
+    db.session.execute(
+        statements.update()
+        .where(statements.c.id == statement_id)
+        .where(statements.c.selected_count > 0)
+        .values(selected_count=statements.c.selected_count - 1)
+    )
+    _statements_written()
+
+
+def recount_selections():
+    """Set every statement's selected_count from the teams table"""
+    statements = ProblemStatement.__table__
+    count = db.select(db.func.count(Team.id)).where(
+        Team.selected_problem_statement_id == statements.c.id
+    ).scalar_subquery()
+    db.session.execute(statements.update().values(selected_count=count))
+    _statements_written()
+    db.session.commit()
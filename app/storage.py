@@ -0,0 +1,193 @@
+"""
+Content-addressed upload storage.
+
+Uploads are streamed to a temp file while being hashed, then moved to
+uploads/[namespace/]ab/cd/<sha256>.<ext>. Identical content is stored once,
+and every stored file has a StoredFile row with its size and content type.
+A file is only removed after the commit that deletes its row.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+
+import click
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from app.config import Config
+from app.models import db, StoredFile, Team, Sponsor
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _extension(filename):
+    if filename and '.' in filename:
+        return '.' + secure_filename(filename).rsplit('.', 1)[1].lower()
+    return ''
+
+
+def _relative_path(sha256, extension, namespace=None):
+    parts = [namespace] if namespace else []
+    parts += [sha256[:2], sha256[2:4], f'{sha256}{extension}']
+    return '/'.join(parts)
+
+
+def store_stream(stream, filename, content_type=None, namespace=None):
+    """Hash and store a binary stream, returning its StoredFile row.
+
+    The row is flushed in a savepoint but not committed, so it lands in the
+    same transaction as the record that references it.
+    """
+    upload_folder = Path(Config.UPLOAD_FOLDER)
+    tmp_dir = upload_folder / '.tmp'
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=str(tmp_dir))
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        relative = _relative_path(sha256, _extension(filename), namespace)
+        path = f'uploads/{relative}'
+        stored = StoredFile.query.filter_by(path=path).first()
+        if not stored:
+            try:
+                # A concurrent upload of the same content may insert the row first;
+                # the savepoint keeps that from failing the caller's transaction
+                with db.session.begin_nested():
+                    stored = StoredFile(
+                        path=path,
+                        sha256=sha256,
+                        size=size,
+                        content_type=content_type or mimetypes.guess_type(filename or '')[0],
+                        original_filename=filename
+                    )
+                    db.session.add(stored)
+            except IntegrityError:
+                stored = StoredFile.query.filter_by(path=path).one()
+
+        # Checked after the row, so content whose file delete_stored has just
+        # removed is written again rather than left pointing at nothing
+        target = upload_folder / relative
+        if target.exists():
+            # Same content already stored - drop the duplicate
+            os.remove(tmp_path)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, str(target))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return stored
+
+
+def store_upload(file, namespace=None):
+    """Store a werkzeug FileStorage upload"""
+    return store_stream(file.stream, file.filename, file.mimetype or None, namespace)
+
+
+def is_referenced(path):
+    """Check whether any team or sponsor still points at a stored path"""
+    return bool(
+        Team.query.filter_by(payment_proof_path=path).first()
+        or Sponsor.query.filter_by(logo_path=path).first()
+    )
+
+
+def delete_stored(path):
+    """Delete a stored file's StoredFile row if nothing references it.
+
+    The file itself is removed once the caller commits, so a rollback
+    leaves both in place.
+    """
+    if is_referenced(path):
+        return False
+    StoredFile.query.filter_by(path=path).delete()
+    db.session.info.setdefault('unlink_paths', set()).add(path)
+    return True
+
+
+def _after_commit(session):
+    paths = session.info.pop('unlink_paths', None)
+    if not paths:
+        return
+    # The session cannot query here; a separate connection sees what others committed
+    files = StoredFile.__table__
+    with db.engine.connect() as conn:
+        for path in paths:
+            # An upload of the same content since the delete brought the row back
+            if conn.execute(db.select(files.c.id).where(files.c.path == path)).first():
+                continue
+            try:
+                os.remove(str(Config.upload_path(path)))
+            except FileNotFoundError:
+                pass
+
+
+def _after_rollback(session):
+    session.info.pop('unlink_paths', None)
+
+
+def _is_sharded(path, namespace=None):
+    prefix = f'uploads/{namespace}/' if namespace else 'uploads/'
+    if not path.startswith(prefix):
+        return False
+    return len(path[len(prefix):].split('/')) == 3
+
+
+def migrate_legacy_uploads():
+    """Move flat timestamped uploads into the content-addressed layout"""
+    migrated = []
+    rows = [(team, 'payment_proof_path', None) for team in Team.query.filter(Team.payment_proof_path.isnot(None))]
+    rows += [(sponsor, 'logo_path', 'sponsors') for sponsor in Sponsor.query.all()]
+
+    for obj, attr, namespace in rows:
+        old_path = getattr(obj, attr)
+        # Leave bundled assets and already migrated files alone
+        if not old_path or not old_path.startswith('uploads/') or _is_sharded(old_path, namespace):
+            continue
+        full_path = Config.upload_path(old_path)
+        if not full_path.is_file():
+            logger.warning("Skipping missing upload: %s", old_path)
+            continue
+        with open(full_path, 'rb') as f:
+            stored = store_stream(f, full_path.name, namespace=namespace)
+        setattr(obj, attr, stored.path)
+        migrated.append(old_path)
+
+    db.session.commit()
+
+    # Only remove the old files once the new paths are committed
+    for old_path in set(migrated):
+        full_path = Config.upload_path(old_path)
+        if full_path.exists() and not is_referenced(old_path):
+            os.remove(str(full_path))
+    return len(migrated)
+
+
+def init_app(app):
+    for name, listener in (('after_commit', _after_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+    @app.cli.command('migrate-uploads')
+    def migrate_uploads_command():
+        """Move existing uploads into the content-addressed layout."""
+        count = migrate_legacy_uploads()
+        click.echo(f'Migrated {count} uploads')
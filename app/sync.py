@@ -0,0 +1,153 @@
+"""
+Incremental sync for the admin team lists.
+
+Team, Member and TeamLogin rows carry updated_at and a row_version. Every
+flush that touches one of them takes the next value from the single-row
+sync_counter table and stamps it on the changed rows; member and login
+changes also stamp their team, because the team lists embed them. The
+counter is bumped inside the writing transaction, so versions become
+visible in commit order. Deleted teams leave a TeamTombstone.
+
+Listings hand out a cursor "<db generation>.<version>"; ?since=<cursor>
+returns only rows with a higher version plus the ids that left the list.
+A cursor from before a database restore is answered with a full listing.
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.schema import CreateIndex
+
+from app.models import db, Team, Member, TeamLogin, SyncCounter, TeamTombstone
+
+logger = logging.getLogger(__name__)
+
+SYNCED_MODELS = (Team, Member, TeamLogin)
+
+# Columns added after the first release; upgrade_schema adds them to older databases
+UPGRADE_COLUMNS = {
+    'teams': ('updated_at', 'row_version'),
+    'members': ('updated_at', 'row_version'),
+    'team_logins': ('updated_at', 'row_version'),
+    'problem_statements': ('capacity', 'selected_count'),
+}
+
+
+def next_version(session):
+    """Increment the sync counter in the current transaction and return it"""
+    conn = session.connection()
+    counter = SyncCounter.__table__
+    result = conn.execute(
+        counter.update().where(counter.c.id == 1).values(value=counter.c.value + 1)
+    )
+    if result.rowcount == 0:
+        conn.execute(counter.insert().values(id=1, value=1))
+        return 1
+    return conn.execute(db.select(counter.c.value).where(counter.c.id == 1)).scalar_one()
+
+
+def _parent_team(session, obj):
+    team = obj.team
+    if team is None and obj.team_id is not None:
+        with session.no_autoflush:
+            team = session.get(Team, obj.team_id)
+    return team
+
+
+def _before_flush(session, flush_context, instances):
+    changed = {
+        obj for obj in session.new if isinstance(obj, SYNCED_MODELS)
+    } | {
+        obj for obj in session.dirty if isinstance(obj, SYNCED_MODELS) and session.is_modified(obj)
+    }
+    deleted_teams = [obj for obj in session.deleted if isinstance(obj, Team)]
+
+    # Team lists embed members and login state, so child changes bump the team too
+    children = [obj for obj in changed if not isinstance(obj, Team)]
+    children += [obj for obj in session.deleted if isinstance(obj, (Member, TeamLogin))]
+    for obj in children:
+        team = _parent_team(session, obj)
+        if team is not None and team not in session.deleted:
+            changed.add(team)
+
+    if not changed and not deleted_teams:
+        return
+
+    version = next_version(session)
+    for obj in changed:
+        obj.row_version = version
+    for team in deleted_teams:
+        session.add(TeamTombstone(
+            team_id=team.id,
+            team_name=team.team_name,
+            reason='rejected' if team.approval_status == 'pending' else 'deleted',
+            row_version=version
+        ))
+
+
+def current_version():
+    return db.session.query(SyncCounter.value).filter_by(id=1).scalar() or 0
+
+
+def current_cursor():
+    from app.restore import read_generation
+    return f'{read_generation()}.{current_version()}'
+
+
+def parse_cursor(cursor):
+    """Version to sync from, or None when a full listing is needed.
+
+    Raises ValueError for a malformed cursor.
+    """
+    from app.restore import read_generation
+    generation, _, version = cursor.partition('.')
+    generation, version = int(generation), int(version)
+    if generation != read_generation() or version > current_version():
+        return None
+    return version
+
+
+def deleted_team_ids(version):
+    rows = db.session.query(TeamTombstone.team_id).filter(TeamTombstone.row_version > version).all()
+    return [row.team_id for row in rows]
+
+
+def team_changes(query, version):
+    """Teams in query changed after version, and ids of teams that left it"""
+    teams = query.filter(Team.row_version > version).all()
+    listed = {team.id for team in teams}
+    changed_ids = db.session.query(Team.id).filter(Team.row_version > version).all()
+    removed = [row.id for row in changed_ids if row.id not in listed]
+    return teams, removed + deleted_team_ids(version)
+
+
+def upgrade_schema():
+    """Add the columns and indexes missing from databases created by an older release"""
+    inspector = db.inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table_name, column_names in UPGRADE_COLUMNS.items():
+            if not inspector.has_table(table_name):
+                continue
+            present = {column['name'] for column in inspector.get_columns(table_name)}
+            table = db.metadata.tables[table_name]
+            for name in column_names:
+                if name in present:
+                    continue
+                column = table.c[name]
+                ddl = f'ALTER TABLE {table_name} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}'
+                if not column.nullable:
+                    ddl += f' NOT NULL DEFAULT {column.default.arg}'
+                conn.exec_driver_sql(ddl)
+                if column.index:
+                    conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS ix_{table_name}_{name} ON {table_name} ({name})')
+                logger.info("Added column %s.%s", table_name, name)
+        # Expression indexes are not reflected, so let the database skip existing ones
+        for table in db.metadata.sorted_tables:
+            if inspector.has_table(table.name):
+                for index in table.indexes:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def init_app(app):
+    # upgrade_schema runs from `flask init-db`, not at worker boot
+    if not event.contains(db.session, 'before_flush', _before_flush):
+        event.listen(db.session, 'before_flush', _before_flush)
@@ -0,0 +1,120 @@
+"""
+Payment proof thumbnails.
+
+register_team schedules a thumbnail after it commits; a background thread
+renders a small JPEG (first page for PDFs) into uploads/thumbs/ so the
+approval screen does not have to download full-size phone photos. A proof
+that cannot be rendered (a PDF without PyMuPDF, a corrupt image, a missing
+file) is remembered for the life of the process and not queued again.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Imported on the thumbnail thread, so worker boot does not pay for them
+PIL_AVAILABLE = find_spec('PIL') is not None
+PYMUPDF_AVAILABLE = find_spec('fitz') is not None  # PyMuPDF, used for the first page of PDF proofs
+
+_executor = None
+_pending = set()
+_failed = set()  # Proofs that did not render; skipped by schedule_thumbnail
+_lock = threading.Lock()
+
+
+def thumbnail_relative_path(proof_path):
+    """Thumbnail location for a stored proof, e.g. uploads/thumbs/ab/cd/<key>.jpg"""
+    stem = Path(proof_path).stem
+    # Content-addressed uploads already have a sha256 name; hash legacy paths
+    if len(stem) != 64:
+        stem = hashlib.sha256(proof_path.encode('utf-8')).hexdigest()
+    return f'uploads/thumbs/{stem[:2]}/{stem[2:4]}/{stem}.jpg'
+
+
+def thumbnail_url(proof_path):
+    """URL of the thumbnail if it has been generated, otherwise None"""
+    if not proof_path:
+        return None
+    relative = thumbnail_relative_path(proof_path)
+    if Config.upload_path(relative).is_file():
+        return f'/api/{relative}'
+    return None
+
+
+def _open_source(source):
+    from PIL import Image, ImageOps
+    if source.suffix.lower() == '.pdf':
+        if not PYMUPDF_AVAILABLE:
+            return None
+        import fitz
+        with fitz.open(str(source)) as doc:
+            if doc.page_count == 0:
+                return None
+            pix = doc[0].get_pixmap(dpi=72)
+            return Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+    image = Image.open(str(source))
+    return ImageOps.exif_transpose(image)
+
+
+def generate_thumbnail(proof_path):
+    """Render the thumbnail for a proof. Returns True if one was written."""
+    if not PIL_AVAILABLE:
+        return False
+    source = Config.upload_path(proof_path)
+    target = Config.upload_path(thumbnail_relative_path(proof_path))
+    if target.exists() or not source.is_file():
+        return target.exists()
+
+    image = _open_source(source)
+    if image is None:
+        return False
+    image.thumbnail((Config.THUMBNAIL_SIZE, Config.THUMBNAIL_SIZE))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(target.parent), suffix='.jpg')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            image.save(tmp, 'JPEG', quality=70, optimize=True)
+        os.replace(tmp_path, str(target))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def _run(proof_path):
+    written = False
+    try:
+        written = generate_thumbnail(proof_path)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", proof_path)
+    finally:
+        with _lock:
+            _pending.discard(proof_path)
+            if not written:
+                _failed.add(proof_path)
+
+
+def schedule_thumbnail(proof_path):
+    """Queue thumbnail generation on the background thread"""
+    global _executor
+    if not proof_path or not PIL_AVAILABLE:
+        return
+    with _lock:
+        if proof_path in _pending or proof_path in _failed:
+            return
+        _pending.add(proof_path)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+    _executor.submit(_run, proof_path)
@@ -0,0 +1,32 @@
+"""
+Savepoints inside real transactions on SQLite.
+
+pysqlite only opens a transaction by itself before INSERT/UPDATE/DELETE, so
+a session that has only read when it calls begin_nested() sends SAVEPOINT
+outside any transaction. SQLite then treats the savepoint as the
+transaction, and RELEASE commits it: the first savepoint of the intake
+writer's batch or of store_stream would be committed on its own, and a
+later rollback could not undo it.
+
+Before a SAVEPOINT, this emits BEGIN if the DBAPI connection has no
+transaction open, so savepoints always nest in the transaction the
+session commits or rolls back. Plain reads keep pysqlite's behaviour and
+hold no lock between statements, so a request that reads and then writes
+still waits for the write lock (busy timeout) instead of failing at once.
+"""
+from sqlalchemy import event
+
+from app.models import db
+
+
+def _savepoint(conn, name):
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql('BEGIN')
+
+
+def init_app(app):
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            return
+        if not event.contains(db.engine, 'savepoint', _savepoint):
+            event.listen(db.engine, 'savepoint', _savepoint)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for benchmarks.
+
+Builds an isolated SQLite database with N teams of 1-4 members, problem
+statements, selections, reviews and sponsors. The data is seeded, so the
+same arguments always produce the same database.
+
+    python benchmarks/datagen.py --teams 2000 --db /tmp/hogwarts_bench.db
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+HOUSES = ['Gryffindor', 'Slytherin', 'Ravenclaw', 'Hufflepuff', 'Muggles']
+DIFFICULTIES = ['easy', 'medium', 'hard']
+COLLEGES = ['Hogwarts Institute', 'Beauxbatons College', 'Durmstrang University', 'Ilvermorny Academy']
+CRITERIA = ['Innovation', 'Implementation', 'Presentation', 'Impact']
+
+
+def build_app(db_path):
+    """Create the app against an isolated database file"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    from app import create_app
+    return create_app()
+
+
+def review_data(rng):
+    criteria = [{'name': name, 'marks': rng.randint(0, 25)} for name in CRITERIA]
+    return sum(c['marks'] for c in criteria), json.dumps({'feedback': 'Solid work', 'criteria': criteria})
+
+
+def generate(app, teams=1000, statements=40, sponsors=12, approved_ratio=0.7, seed=42):
+    from app.models import db, Team, Member, ProblemStatement, Review, Sponsor, TeamLogin, AdminSettings
+
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        for key in ('login_enabled', 'registration_enabled', 'teams_enabled'):
+            db.session.add(AdminSettings(key=key, value='true'))
+
+        statement_rows = []
+        for i in range(statements):
+            house = rng.choice(HOUSES)
+            statement_rows.append({
+                'title': f'Problem statement {i + 1}',
+                'description': 'Build a magical solution. ' * rng.randint(10, 60),
+                'domain': house.lower(),
+                'difficulty': rng.choice(DIFFICULTIES),
+                'house': house if rng.random() < 0.5 else None,
+                'created_at': start + timedelta(minutes=i),
+            })
+        db.session.execute(db.insert(ProblemStatement), statement_rows)
+
+        team_rows = []
+        for i in range(teams):
+            approved = rng.random() < approved_ratio
+            team_rows.append({
+                'id': i + 1,
+                'team_name': f'Team {i + 1:05d}',
+                'house': rng.choice(HOUSES),
+                'team_size': rng.randint(1, 4),
+                'utr_transaction_id': f'UTR{100000000 + i}',
+                'payment_proof_path': None,
+                'registered_at': start + timedelta(seconds=i * 37),
+                'approval_status': 'approved' if approved else 'pending',
+                'selected_problem_statement_id': rng.randint(1, statements) if approved and rng.random() < 0.6 else None,
+                'git_repo_url': f'https://github.com/hogwarts/team-{i + 1}' if approved and rng.random() < 0.5 else None,
+            })
+        db.session.execute(db.insert(Team), team_rows)
+
+        member_rows, login_rows, review_rows = [], [], []
+        for team in team_rows:
+            for order in range(1, team['team_size'] + 1):
+                member_rows.append({
+                    'team_id': team['id'],
+                    'name': f"Wizard {team['id']}-{order}",
+                    'email': f"wizard{team['id']}_{order}@example.com",
+                    'phone': f'9{team["id"]:05d}{order:04d}',
+                    'college_name': rng.choice(COLLEGES),
+                    'is_leader': order == 1,
+                    'member_order': order,
+                })
+            if team['approval_status'] != 'approved':
+                continue
+            login_rows.append({
+                'team_id': team['id'],
+                'username': f"Wizard {team['id']}-1",
+                'password': team['utr_transaction_id'],
+                'house': team['house'],
+            })
+            if rng.random() < 0.8:
+                row = {'team_id': team['id']}
+                for n in (1, 2, 3):
+                    if n == 1 or rng.random() < 0.5:
+                        row[f'review{n}_marks'], row[f'review{n}_data'] = review_data(rng)
+                    else:
+                        row[f'review{n}_marks'], row[f'review{n}_data'] = 0, None
+                review_rows.append(row)
+        db.session.execute(db.insert(Member), member_rows)
+        if login_rows:
+            db.session.execute(db.insert(TeamLogin), login_rows)
+        if review_rows:
+            db.session.execute(db.insert(Review), review_rows)
+
+        db.session.execute(db.insert(Sponsor), [{
+            'name': f'Sponsor {i + 1}',
+            'logo_path': 'assets/stamp.png',
+            'redirect_url': f'https://sponsor{i + 1}.example.com',
+            'display_order': i,
+        } for i in range(sponsors)])
+
+        db.session.commit()
+        # Bulk inserts bypass the commit hooks, so drop anything cached for an older dataset
+        from app.cache import clear_cache
+        from app.selection import recount_selections
+        clear_cache()
+        recount_selections()
+        return {
+            'teams': teams,
+            'members': len(member_rows),
+            'statements': statements,
+            'reviews': len(review_rows),
+            'sponsors': sponsors,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default='/tmp/hogwarts_bench.db', help='SQLite file to (re)create')
+    parser.add_argument('--teams', type=int, default=1000)
+    parser.add_argument('--statements', type=int, default=40)
+    parser.add_argument('--sponsors', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = build_app(args.db)
+    counts = generate(app, teams=args.teams, statements=args.statements, sponsors=args.sponsors, seed=args.seed)
+    print(json.dumps({'db': args.db, **counts}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Registration-day load test.
+
+Generates an isolated database, starts a local gunicorn against it and
+replays scripted workloads that mimic real traffic, reporting p50/p95/p99
+latency and throughput per workload:
+
+    toggle_polling   main.html polling the login/registration toggles
+    teams_browse     teams.html listing /api/teams
+    register         register.html submitting a team with a payment proof and
+                     polling its ticket until the registration is committed
+    team_dashboard   index.html loading a logged-in team's dashboard with
+                     /api/teams/<id>/dashboard
+    admin_approval   accept_team.html approving pending teams in a burst
+    review_export    review_marks.html exporting the marks workbook
+
+    python benchmarks/loadtest.py                      # compare with baseline.json
+    python benchmarks/loadtest.py --save-baseline      # refresh the baseline
+    python benchmarks/loadtest.py --workloads register,team_dashboard --duration 20
+    python benchmarks/loadtest.py --profile registration_day --output /tmp/registration_day.json
+
+Only the standard library is used on the client side.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# 1x1 transparent PNG used as the payment proof
+PROOF_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000b49444154789c6360000200000500017a5eab3f0000000049454e44ae426082'
+)
+
+
+class Client:
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, headers=None, with_body=False):
+        """Status code (0 on a network error), or (status, body) with with_body"""
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                status, content = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status, content = 0, b''
+        return (status, content) if with_body else status
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post_json(self, path, data):
+        return self.request('POST', path, json.dumps(data).encode(), {'Content-Type': 'application/json'})
+
+    def post_multipart(self, path, fields, files):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, (filename, content, content_type) in files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return self.request('POST', path, b''.join(parts), {'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                            with_body=True)
+
+    def register(self, fields, files, poll_interval=0.02):
+        """Submit a registration and poll its ticket until the writer has accepted or rejected it.
+
+        Returns the final status code: that of the accepting poll, 409 for a
+        rejected ticket, or 0 if it was still queued after the timeout.
+        """
+        status, body = self.post_multipart('/api/register', fields, files)
+        if status != 202:
+            return status
+        status_url = json.loads(body)['status_url']
+        deadline = time.perf_counter() + self.timeout
+        while time.perf_counter() < deadline:
+            time.sleep(poll_interval)
+            status, body = self.request('GET', status_url, with_body=True)
+            if status != 200:
+                return status
+            ticket = json.loads(body)
+            if ticket['status'] == 'accepted':
+                return status
+            if ticket['status'] == 'rejected':
+                return 409
+        return 0
+
+
+class Fixture:
+    """IDs from the generated database that the workloads pick from"""
+
+    def __init__(self, db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            self.approved = [r[0] for r in conn.execute("SELECT id FROM teams WHERE approval_status = 'approved'")]
+            self.pending = [r[0] for r in conn.execute("SELECT id FROM teams WHERE approval_status = 'pending' ORDER BY id")]
+        finally:
+            conn.close()
+        self._pending_iter = iter(self.pending)
+        self._lock = threading.Lock()
+        self._registration = itertools.count(1)
+        self.run_id = uuid.uuid4().hex[:6]
+
+    def next_pending(self):
+        with self._lock:
+            return next(self._pending_iter, None)
+
+    def next_registration(self):
+        with self._lock:
+            return next(self._registration)
+
+
+# Each workload performs one scripted user action and returns the status codes
+# of the requests it made; every request is timed individually.
+
+def toggle_polling(client, fixture, rng, record):
+    record(client.get, '/api/admin/login-toggle')
+    record(client.get, '/api/admin/registration-toggle')
+
+
+def teams_browse(client, fixture, rng, record):
+    if rng.random() < 0.3:
+        record(client.get, f'/api/teams?house={rng.choice(["Gryffindor", "Slytherin", "Ravenclaw"])}')
+    else:
+        record(client.get, '/api/teams')
+
+
+def register(client, fixture, rng, record):
+    n = fixture.next_registration()
+    size = rng.randint(1, 4)
+    fields = {
+        'team_name': f'Load {fixture.run_id} {n}',
+        'house': rng.choice(['gryffindor', 'slytherin', 'ravenclaw', 'hufflepuff', 'muggles']),
+        'team_size': str(size),
+        'utr_transaction_id': f'LT{fixture.run_id}{n:08d}',
+    }
+    for i in range(1, size + 1):
+        fields[f'member_{i}_name'] = f'Load Wizard {n}-{i}'
+        fields[f'member_{i}_email'] = f'load_{fixture.run_id}_{n}_{i}@example.com'
+        fields[f'member_{i}_phone'] = f'8{n:05d}{i:04d}'
+        fields[f'member_{i}_college'] = 'Hogwarts Institute'
+    # Timed from submission until the queued registration is committed
+    record(client.register, fields, {'payment_proof': ('proof.png', PROOF_PNG, 'image/png')})
+
+
+def team_dashboard(client, fixture, rng, record):
+    team_id = rng.choice(fixture.approved)
+    record(client.get, f'/api/teams/{team_id}/dashboard')
+
+
+def admin_approval(client, fixture, rng, record):
+    team_id = fixture.next_pending()
+    if team_id is None:
+        record(client.get, '/api/admin/pending-teams')
+        return
+    record(client.post_json, f'/api/admin/approve-team/{team_id}', {})
+    if rng.random() < 0.2:
+        record(client.get, '/api/admin/pending-teams')
+
+
+def review_export(client, fixture, rng, record):
+    record(client.get, '/api/admin/review-marks/export')
+
+
+WORKLOADS = {
+    'toggle_polling': toggle_polling,
+    'teams_browse': teams_browse,
+    'register': register,
+    'team_dashboard': team_dashboard,
+    'admin_approval': admin_approval,
+    'review_export': review_export,
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_workload(name, client, fixture, duration, concurrency, seed):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        local_latencies = []
+        local_statuses = {}
+
+        def record(call, *args):
+            start = time.perf_counter()
+            status = call(*args)
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+
+        while time.perf_counter() < deadline:
+            WORKLOADS[name](client, fixture, rng, record)
+
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'errors': errors,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def start_server(args, db_path, upload_folder):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        # gunicorn runs from the repo root; keep the proofs out of its uploads/
+        'UPLOAD_FOLDER': upload_folder,
+        'EMAIL_ENABLED': 'false',
+        'LOG_LEVEL': 'WARNING',
+        # Every simulated client shares one address and polls far faster than a browser
+        'RATE_LIMITS': 'off',
+        # The workloads measure each endpoint at full concurrency; shed requests would count as errors
+        'ADMISSION_ROUTE_LIMITS': 'off',
+    })
+    cmd = [sys.executable, '-m', 'gunicorn', '--chdir', str(ROOT), '-b', f'127.0.0.1:{args.port}']
+    if args.profile:
+        # Settings come from gunicorn.conf.py and profiles/<name>.py
+        env['GUNICORN_PROFILE'] = args.profile
+        cmd += ['-c', str(ROOT / 'gunicorn.conf.py')]
+    else:
+        # Plain gunicorn defaults, comparable with baseline.json, rather than ./gunicorn.conf.py
+        cmd += ['-c', '/dev/null']
+    if args.workers or not args.profile:
+        cmd += ['-w', str(args.workers or 4)]
+    cmd += args.gunicorn_args.split() + ['wsgi:app']
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    client = Client(f'http://127.0.0.1:{args.port}', timeout=2)
+    for _ in range(150):
+        if proc.poll() is not None:
+            raise SystemExit(f'gunicorn exited early:\n{proc.stderr.read().decode()}')
+        if client.get('/api/sponsors') == 200:
+            return proc
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit('gunicorn did not become ready')
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def compare(results, baseline):
+    print(f"\n{'workload':<16}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}   p95 vs baseline")
+    for name, r in results['workloads'].items():
+        line = f"{name:<16}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}"
+        base = (baseline or {}).get('workloads', {}).get(name)
+        if base and base['p95_ms']:
+            delta = (r['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100
+            line += f"   {delta:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Registration-day load test')
+    parser.add_argument('--db', default='/tmp/hogwarts_loadtest.db')
+    parser.add_argument('--teams', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, help='gunicorn worker processes (default 4, or the profile\'s count)')
+    parser.add_argument('--profile', help='run gunicorn with a profile from profiles/, e.g. registration_day')
+    parser.add_argument('--gunicorn-args', default='', help='extra gunicorn arguments, e.g. "-k gthread --threads 8"')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent simulated clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per workload')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to --baseline')
+    parser.add_argument('--output', help='also write the results JSON here')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.workloads.split(',') if name.strip()]
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        parser.error(f'unknown workloads: {", ".join(sorted(unknown))}')
+
+    subprocess.run(
+        [sys.executable, str(ROOT / 'benchmarks' / 'datagen.py'), '--db', args.db,
+         '--teams', str(args.teams), '--seed', str(args.seed)],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    fixture = Fixture(args.db)
+
+    upload_folder = tempfile.TemporaryDirectory(prefix='hogwarts_loadtest_uploads_')
+    proc = start_server(args, args.db, upload_folder.name)
+    try:
+        client = Client(f'http://127.0.0.1:{args.port}')
+        results = {
+            'config': {
+                'teams': args.teams,
+                'workers': args.workers,
+                'profile': args.profile,
+                'gunicorn_args': args.gunicorn_args,
+                'concurrency': args.concurrency,
+                'duration_s': args.duration,
+            },
+            'workloads': {},
+        }
+        for name in names:
+            print(f'Running {name} for {args.duration:g}s with {args.concurrency} clients...', file=sys.stderr)
+            results['workloads'][name] = run_workload(name, client, fixture, args.duration, args.concurrency, args.seed)
+    finally:
+        stop_server(proc)
+        upload_folder.cleanup()
+
+    baseline = None
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())
+    compare(results, baseline)
+
+    text = json.dumps(results, indent=2, sort_keys=True) + '\n'
+    if args.save_baseline:
+        baseline_path.write_text(text)
+        print(f'\nBaseline written to {baseline_path}')
+    if args.output:
+        Path(args.output).write_text(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for model serializers and hot helpers.
+
+Times Team.to_dict, Team.to_dict_summary, Review.to_dict, allowed_file and
+build_ticket_html over 10 / 1k / 10k rows with timeit, and measures the
+memory allocated per call with tracemalloc. Objects are built in memory
+(no database), so only the Python cost is measured. The json_* benchmarks
+encode a team listing, and the json_export_* ones the review export's JSON
+payload, with each installed JSON backend.
+
+    python benchmarks/microbench.py                    # compare with microbench_baseline.json
+    python benchmarks/microbench.py --save-baseline
+    python benchmarks/microbench.py --only team_to_dict,review_to_dict --scales 1000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from flask import Flask  # noqa: E402
+
+from app.json_provider import PROVIDERS, ORJSON_AVAILABLE, MSGSPEC_AVAILABLE  # noqa: E402
+from app.models import Team, Member, Review  # noqa: E402
+from app.routes import allowed_file, build_ticket_html, review_export_payload  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'microbench_baseline.json'
+SCALES = (10, 1000, 10000)
+HOUSES = ['Gryffindor', 'Slytherin', 'Ravenclaw', 'Hufflepuff', 'Muggles']
+
+
+def make_teams(n, rng):
+    start = datetime(2025, 1, 1)
+    teams = []
+    for i in range(n):
+        team = Team(
+            id=i + 1,
+            team_name=f'Team {i + 1:05d}',
+            house=rng.choice(HOUSES),
+            team_size=rng.randint(1, 4),
+            utr_transaction_id=f'UTR{100000000 + i}',
+            payment_proof_path=f'uploads/ab/cd/{i:064d}.png',
+            registered_at=start + timedelta(seconds=i),
+            approval_status='approved',
+            git_repo_url=f'https://github.com/hogwarts/team-{i}',
+        )
+        team.members = [
+            Member(
+                id=i * 4 + order,
+                name=f'Wizard {i}-{order}',
+                email=f'wizard{i}_{order}@example.com',
+                phone='9000000000',
+                college_name='Hogwarts Institute',
+                is_leader=order == 1,
+                member_order=order,
+            )
+            for order in range(1, team.team_size + 1)
+        ]
+        teams.append(team)
+    return teams
+
+
+def make_reviews(n, rng):
+    reviews = []
+    for i in range(n):
+        review = Review(id=i + 1, team_id=i + 1, created_at=datetime(2025, 1, 1), updated_at=datetime(2025, 1, 2))
+        for num in (1, 2, 3):
+            criteria = [{'name': name, 'marks': rng.randint(0, 25)} for name in ('Innovation', 'Impact', 'Design', 'Demo')]
+            setattr(review, f'review{num}_marks', sum(c['marks'] for c in criteria))
+            setattr(review, f'review{num}_data', json.dumps({'feedback': 'Well done ' * 5, 'criteria': criteria}))
+        reviews.append(review)
+    return reviews
+
+
+def make_filenames(n, rng):
+    names = ['proof.png', 'PAYMENT.JPG', 'scan.pdf', 'photo.jpeg', 'notes.txt', 'noextension', 'archive.tar.gz']
+    return [f'{i}_{rng.choice(names)}' for i in range(n)]
+
+
+def make_team_listing(n, rng):
+    return {'success': True, 'teams': [t.to_dict() for t in make_teams(n, rng)]}
+
+
+def make_review_export(n, rng):
+    reviews = make_reviews(n, rng)
+    for review, team in zip(reviews, make_teams(n, rng)):
+        review.team = team
+    return review_export_payload(reviews)
+
+
+def json_benchmark(backend, setup=make_team_listing):
+    provider = PROVIDERS[backend](Flask(__name__))
+    return setup, provider.dumps
+
+
+# name -> (setup(n, rng) -> data, run(data))
+BENCHMARKS = {
+    'team_to_dict': (make_teams, lambda teams: [t.to_dict() for t in teams]),
+    'team_to_dict_summary': (make_teams, lambda teams: [t.to_dict_summary() for t in teams]),
+    'review_to_dict': (make_reviews, lambda reviews: [r.to_dict() for r in reviews]),
+    'allowed_file': (make_filenames, lambda names: [allowed_file(name) for name in names]),
+    'build_ticket_html': (make_teams, lambda teams: [build_ticket_html(t, t.members, '') for t in teams]),
+    'json_stdlib': json_benchmark('stdlib'),
+    'json_export_stdlib': json_benchmark('stdlib', make_review_export),
+}
+if ORJSON_AVAILABLE:
+    BENCHMARKS['json_orjson'] = json_benchmark('orjson')
+    BENCHMARKS['json_export_orjson'] = json_benchmark('orjson', make_review_export)
+if MSGSPEC_AVAILABLE:
+    BENCHMARKS['json_msgspec'] = json_benchmark('msgspec')
+    BENCHMARKS['json_export_msgspec'] = json_benchmark('msgspec', make_review_export)
+
+
+def measure(name, n, min_time):
+    setup, run = BENCHMARKS[name]
+    data = setup(n, random.Random(42))
+    run(data)  # warm up attribute instrumentation and caches
+
+    timer = timeit.Timer(lambda: run(data))
+    loops, _ = timer.autorange()
+    loops = max(1, int(loops * min_time / 0.2))
+    best = min(timer.repeat(repeat=5, number=loops)) / loops
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ops_per_sec': round(n / best),
+        'us_per_op': round(best / n * 1e6, 3),
+        'alloc_bytes_per_op': round((peak - before) / n),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serializer and helper microbenchmarks')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help='comma-separated benchmark names')
+    parser.add_argument('--scales', default=','.join(map(str, SCALES)), help='comma-separated row counts')
+    parser.add_argument('--min-time', type=float, default=0.2, help='approximate seconds per timing repeat')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(',') if n.strip()]
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+    scales = [int(s) for s in args.scales.split(',')]
+
+    baseline = {}
+    if Path(args.baseline).exists() and not args.save_baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+
+    results = {}
+    print(f"{'benchmark':<22}{'rows':>7}{'ops/sec':>12}{'us/op':>10}{'B/op':>9}   ops/sec vs baseline")
+    for name in names:
+        for n in scales:
+            key = f'{name}[{n}]'
+            result = results[key] = measure(name, n, args.min_time)
+            line = f"{name:<22}{n:>7}{result['ops_per_sec']:>12}{result['us_per_op']:>10}{result['alloc_bytes_per_op']:>9}"
+            base = baseline.get(key)
+            if base:
+                line += f"   {(result['ops_per_sec'] - base['ops_per_sec']) / base['ops_per_sec'] * 100:+.0f}%"
+            print(line)
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f'\nBaseline written to {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
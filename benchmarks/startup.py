@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Worker boot benchmark.
+
+Starts fresh interpreters and times `import app`, create_app() and the
+first request (GET /api/sponsors), which is what every gunicorn worker pays
+without --preload. It also lists the optional heavy modules (openpyxl,
+smtplib, PIL, redis) that ended up imported by boot, which should be none,
+and checks that create_app did not write to the database.
+
+    python benchmarks/startup.py                  # compare with startup_baseline.json
+    python benchmarks/startup.py --runs 20 --save-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / 'startup_baseline.json'
+LAZY_MODULES = ('openpyxl', 'smtplib', 'PIL', 'redis', 'fitz')
+
+CHILD = r'''
+import json, os, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+from app import create_app
+application = create_app()
+t2 = time.perf_counter()
+db_mtime = os.stat(os.environ['BENCH_DB']).st_mtime_ns
+client = application.test_client()
+status = client.get('/api/sponsors').status_code
+t3 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'create_app_ms': (t2 - t1) * 1000,
+    'first_request_ms': (t3 - t2) * 1000,
+    'status': status,
+    'modules': len(sys.modules),
+    'lazy_loaded': [m for m in %r if m in sys.modules],
+    'db_untouched': db_mtime == int(os.environ['BENCH_DB_MTIME']),
+}))
+''' % (LAZY_MODULES,)
+
+
+def prepare_database(path, env):
+    """Create the schema once, the way a deploy's init-db step would"""
+    subprocess.run(
+        [sys.executable, '-c',
+         'from wsgi import app\nfrom app.cli import init_db\nwith app.app_context(): init_db()'],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=ROOT, env=env, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Application startup benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to start')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'startup.db'
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', BENCH_DB=str(db_path),
+                   EMAIL_ENABLED='false', LOG_LEVEL='WARNING')
+        prepare_database(db_path, env)
+        env['BENCH_DB_MTIME'] = str(os.stat(db_path).st_mtime_ns)
+        samples = [run_once(env) for _ in range(args.runs)]
+
+    results = {
+        key: round(statistics.median(s[key] for s in samples), 1)
+        for key in ('import_ms', 'create_app_ms', 'first_request_ms')
+    }
+    results['boot_ms'] = round(results['import_ms'] + results['create_app_ms'], 1)
+    results['modules'] = samples[-1]['modules']
+
+    baseline = {}
+    if Path(args.baseline).exists() and not args.save_baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+
+    print(f'median of {args.runs} fresh interpreters')
+    for key, value in results.items():
+        line = f'{key:<18}{value:>10}'
+        if key in baseline and baseline[key]:
+            line += f'   {(value - baseline[key]) / baseline[key] * 100:+.0f}% vs baseline'
+        print(line)
+
+    lazy_loaded = sorted({m for s in samples for m in s['lazy_loaded']})
+    print(f"lazy modules loaded at boot: {', '.join(lazy_loaded) or 'none'}")
+    print(f"database untouched by create_app: {all(s['db_untouched'] for s in samples)}")
+    if any(s['status'] != 200 for s in samples):
+        print('warning: first request did not return 200')
+
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f'\nBaseline written to {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
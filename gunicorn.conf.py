@@ -0,0 +1,18 @@
+"""
+Gunicorn configuration, read automatically from the project root.
+
+GUNICORN_PROFILE picks a module from profiles/ (default registration_day);
+command-line flags still override anything set here:
+
+    gunicorn wsgi:app
+    GUNICORN_PROFILE=judging gunicorn wsgi:app
+    GUNICORN_WORKER_CLASS=gevent WEB_CONCURRENCY=4 gunicorn wsgi:app
+"""
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_profile = importlib.import_module(f"profiles.{os.environ.get('GUNICORN_PROFILE') or 'registration_day'}")
+globals().update({name: value for name, value in vars(_profile).items() if not name.startswith('_')})
@@ -0,0 +1,6 @@
+"""
+Gunicorn profiles, selected with GUNICORN_PROFILE (see gunicorn.conf.py).
+
+- registration_day: participants polling, browsing teams and uploading proofs
+- judging: judges and admins entering review marks and exporting workbooks
+"""
@@ -0,0 +1,150 @@
+"""
+Settings and hooks shared by every gunicorn profile.
+
+A profile module does `from profiles.base import *` and overrides what it
+needs. Worker and thread counts are computed from the cores this process
+may actually use (CPU affinity and the cgroup quota, so containers are
+sized correctly); WEB_CONCURRENCY and GUNICORN_THREADS override them.
+"""
+import logging
+import math
+import os
+import shutil
+import tempfile
+from importlib.util import find_spec
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def available_cores():
+    """CPUs usable by this process, honouring affinity and a cgroup v2 quota"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def select_worker_class(preferred='gthread'):
+    """GUNICORN_WORKER_CLASS or the preferred class.
+
+    gevent falls back to gthread if it is not installed. When gevent is used
+    the standard library is patched here, before the app is preloaded.
+    """
+    worker = (os.environ.get('GUNICORN_WORKER_CLASS') or preferred).lower()
+    if worker == 'gevent':
+        if find_spec('gevent') is None:
+            logger.warning("gevent is not installed; using gthread workers")
+            return 'gthread'
+        from gevent import monkey
+        monkey.patch_all()
+    return worker
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def set_shed_threshold(slots, share=0.75):
+    """Have the app shed low-priority reads once share of the request slots are busy.
+
+    Sets ADMISSION_SHED_AT unless it is already set; the app reads it when
+    it is preloaded, after this file.
+    """
+    os.environ.setdefault('ADMISSION_SHED_AT', str(max(1, int(slots * share))))
+
+
+def prepare_metrics_dir():
+    """Point PROMETHEUS_MULTIPROC_DIR at an empty directory for this run.
+
+    Called while the config is read: the preloaded app imports
+    prometheus_client, which chooses multiprocess mode on import, before
+    on_starting runs. A directory given in the environment is emptied,
+    since files left by an earlier run would be added to the totals;
+    otherwise a temporary one is made and removed again by on_exit.
+    """
+    global _metrics_dir_created
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith('.db'):
+                os.remove(os.path.join(path, name))
+    else:
+        path = tempfile.mkdtemp(prefix='hogwarts-metrics-')
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = path
+        _metrics_dir_created = path
+    return path
+
+
+_metrics_dir_created = None
+CORES = available_cores()
+prepare_metrics_dir()
+
+bind = f"0.0.0.0:{os.environ.get('PORT') or '8000'}"
+# Build the app once in the master; create_app has no side effects, and
+# workers share its memory copy-on-write
+preload_app = True
+worker_class = 'gthread'
+workers = env_int('WEB_CONCURRENCY', CORES * 2 + 1)
+threads = env_int('GUNICORN_THREADS', 4)
+worker_connections = 1000  # gevent only
+# Recycle workers now and then; the jitter keeps them from restarting together
+max_requests = 1000
+max_requests_jitter = 100
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS') or '127.0.0.1'
+
+
+def when_ready(server):
+    """Warm the shared caches once the master is listening"""
+    if not server.cfg.preload_app:
+        return
+    from app.models import db
+    from app.routes import warm_caches
+    app = server.app.wsgi()
+    with app.app_context():
+        try:
+            warm_caches()
+        except Exception:
+            # Usually a database that has not been through `flask init-db` yet
+            logger.exception("Cache warm-up failed")
+        finally:
+            db.session.remove()
+            # Workers must not inherit the master's pooled connections
+            db.engine.dispose()
+    server.log.info("Caches warmed")
+
+
+def post_fork(server, worker):
+    """Drop connections inherited from the master without closing them for it"""
+    if not server.cfg.preload_app:
+        return
+    from app.models import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def on_starting(server):
+    server.log.info("Prometheus metrics in %s", os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+
+def on_exit(server):
+    if _metrics_dir_created:
+        shutil.rmtree(_metrics_dir_created, ignore_errors=True)
+
+
+def child_exit(server, worker):
+    from app.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,18 @@
+"""
+Judging: a few dozen judges and admins entering review marks and exporting
+the marks workbook.
+
+Exports are CPU-bound, so this profile runs more processes with fewer
+threads, allows longer requests and recycles workers sooner, since
+building workbooks grows worker memory.
+"""
+from profiles.base import *  # noqa: F401,F403
+
+worker_class = select_worker_class('gthread')
+workers = env_int('WEB_CONCURRENCY', CORES * 2 + 1)
+threads = env_int('GUNICORN_THREADS', 2)
+timeout = 120
+max_requests = 300
+max_requests_jitter = 50
+
+set_shed_threshold(workers * threads)
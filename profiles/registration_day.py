@@ -0,0 +1,20 @@
+"""
+Registration day: hundreds of participants polling the toggles, browsing
+the team list and uploading payment proofs, often over slow mobile links.
+
+Threads keep a slow upload or an approval email's SMTP round trip from
+holding a whole worker. Processes stay close to the core count: SQLite
+takes one writer at a time, so extra processes only queue on its lock.
+"""
+from profiles.base import *  # noqa: F401,F403
+
+worker_class = select_worker_class('gthread')
+workers = env_int('WEB_CONCURRENCY', CORES + 1)
+threads = env_int('GUNICORN_THREADS', 8)
+# A 16 MB proof over a slow connection
+timeout = 60
+max_requests = 2000
+max_requests_jitter = 200
+backlog = 2048
+
+set_shed_threshold(workers * threads)
@@ -23,12 +23,18 @@ def setup_database():
     """Initialize the database"""
     try:
         from app import create_app
-        from app.models import db
+        from app.cli import init_db
         
         app = create_app()
         with app.app_context():
-            db.create_all()
+            init_db()
             print("Database initialized successfully!")
+            
+            # Move any flat uploads from older versions into the sharded layout
+            from app.storage import migrate_legacy_uploads
+            migrated = migrate_legacy_uploads()
+            if migrated:
+                print(f"Migrated {migrated} uploads to content-addressed storage")
     except Exception as e:
         print(f"Error initializing database: {e}")
 
@@ -0,0 +1,46 @@
+"""
+Shared fixtures: the app runs against a throwaway SQLite database and
+upload folder, set up before app.config is imported.
+"""
+import os
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix='hogwarts_tests_')
+os.environ['DATABASE_URL'] = f'sqlite:///{_TMP}/test.db'
+os.environ['UPLOAD_FOLDER'] = f'{_TMP}/uploads'
+os.environ['EMAIL_ENABLED'] = 'false'
+os.environ['RATE_LIMITS'] = 'off'
+os.environ['ADMISSION_ENABLED'] = 'false'
+
+from app import create_app  # noqa: E402
+from app.cache import clear_cache  # noqa: E402
+from app.models import db  # noqa: E402
+from app.sync import upgrade_schema  # noqa: E402
+
+ADMIN = {'X-Admin-Auth': 'true'}
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def ctx(app):
+    """An app context over empty tables"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        upgrade_schema()
+        clear_cache()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(ctx):
+    return ctx.test_client()
@@ -0,0 +1,21 @@
+from conftest import ADMIN
+
+
+def test_filters_get_their_own_etag(client):
+    client.post('/api/admin/teams-toggle', json={'enabled': True}, headers=ADMIN)
+
+    everyone = client.get('/api/teams')
+    gryffindor = client.get('/api/teams?house=Gryffindor')
+    slytherin = client.get('/api/teams?house=Slytherin')
+    assert len({everyone.headers['ETag'], gryffindor.headers['ETag'], slytherin.headers['ETag']}) == 3
+
+    # The ETag of one filter does not validate another
+    assert client.get('/api/teams?house=Slytherin', headers={'If-None-Match': gryffindor.headers['ETag']}).status_code == 200
+    assert client.get('/api/teams?house=Gryffindor', headers={'If-None-Match': gryffindor.headers['ETag']}).status_code == 304
+
+
+def test_problem_statement_filters_get_their_own_etag(client):
+    by_house = client.get('/api/admin/problem-statements?house=Gryffindor')
+    by_domain = client.get('/api/admin/problem-statements?domain=gryffindor')
+    assert by_house.status_code == by_domain.status_code == 200
+    assert by_house.headers['ETag'] != by_domain.headers['ETag']
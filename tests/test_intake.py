@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import intake
+from app.models import db, Team, RegistrationTicket
+
+
+def payload(n):
+    return {
+        'team_name': f'Team {n}',
+        'house': 'Gryffindor',
+        'team_size': 1,
+        'utr_transaction_id': f'UTR{n}',
+        'payment_proof_path': None,
+        'members': [{
+            'name': f'Member {n}',
+            'email': f'member{n}@example.com',
+            'phone': '9999999999',
+            'college_name': 'Hogwarts',
+        }],
+    }
+
+
+def test_batch_applies_every_ticket(ctx):
+    for n in range(3):
+        intake.enqueue(payload(n))
+    db.session.commit()
+
+    assert intake.process_batch() == 3
+    db.session.remove()
+    assert Team.query.count() == 3
+    assert {t.status for t in RegistrationTicket.query} == {'accepted'}
+
+
+def test_failed_commit_leaves_no_teams(ctx, monkeypatch):
+    for n in range(3):
+        intake.enqueue(payload(n))
+    db.session.commit()
+
+    def locked():
+        raise OperationalError('COMMIT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(db.session, 'commit', locked)
+    with pytest.raises(OperationalError):
+        intake.process_batch()
+    db.session.rollback()
+    monkeypatch.undo()
+    db.session.remove()
+
+    # Nothing from the batch may be visible, not even its first savepoint
+    assert Team.query.count() == 0
+    assert {t.status for t in RegistrationTicket.query} == {'queued'}
+
+    # The retry then accepts all of them
+    assert intake.process_batch() == 3
+    db.session.remove()
+    assert Team.query.count() == 3
+    assert {t.status for t in RegistrationTicket.query} == {'accepted'}
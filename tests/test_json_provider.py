@@ -0,0 +1,20 @@
+import json
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.json_provider import PROVIDERS, ORJSON_AVAILABLE, MSGSPEC_AVAILABLE
+from app.models import Team
+
+BACKENDS = ['stdlib'] + ['orjson'] * ORJSON_AVAILABLE + ['msgspec'] * MSGSPEC_AVAILABLE
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_datetimes_are_iso_8601(backend):
+    registered_at = datetime(2025, 1, 2, 3, 4, 5, 678901)
+    team = Team(id=1, team_name='Team', house='Gryffindor', team_size=1, utr_transaction_id='UTR',
+                registered_at=registered_at, approval_status='pending')
+    team.members = []
+    provider = PROVIDERS[backend](Flask(__name__))
+    assert json.loads(provider.dumps(team.to_dict()))['registered_at'] == registered_at.isoformat()
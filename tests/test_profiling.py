@@ -0,0 +1,22 @@
+from conftest import ADMIN
+
+from app import profiling
+from app.models import db
+
+
+def test_profiling_settings_need_admin(client):
+    assert client.get('/api/admin/profiling').status_code == 401
+    assert client.post('/api/admin/profiling', json={'sample_rate': 5}).status_code == 401
+
+    assert client.post('/api/admin/profiling', json={'sample_rate': 5}, headers=ADMIN).status_code == 200
+    response = client.get('/api/admin/profiling', headers=ADMIN)
+    assert response.status_code == 200
+    assert response.get_json()['sample_rate'] == 5
+    client.post('/api/admin/profiling', json={'sample_rate': 0}, headers=ADMIN)
+
+
+def test_settings_load_outside_the_session(ctx):
+    db.session.remove()
+    profiling.invalidate_settings()
+    profiling.current_settings()
+    assert not db.session().in_transaction()
@@ -0,0 +1,47 @@
+import io
+import sqlite3
+
+from conftest import ADMIN
+
+from app.models import db, Team
+from app.restore import database_path, read_generation
+
+
+def add_team(name):
+    db.session.add(Team(team_name=name, house='Gryffindor', team_size=1, utr_transaction_id=name))
+    db.session.commit()
+
+
+def team_names(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return {row[0] for row in conn.execute('SELECT team_name FROM teams')}
+    finally:
+        conn.close()
+
+
+def test_restore_replaces_the_engine_database(client, tmp_path):
+    add_team('Uploaded')
+    upload = tmp_path / 'upload.db'
+    source = sqlite3.connect(str(database_path()))
+    target = sqlite3.connect(str(upload))
+    source.backup(target)
+    target.close()
+    source.close()
+    add_team('Live only')
+    db.session.remove()
+
+    generation = read_generation()
+    response = client.post(
+        '/api/admin/upload-database',
+        data={'database': (io.BytesIO(upload.read_bytes()), 'upload.db')},
+        headers=ADMIN, content_type='multipart/form-data'
+    )
+    assert response.status_code == 200, response.get_json()
+    assert read_generation() == generation + 1
+
+    # The database the app is configured with was swapped, not instance/
+    assert team_names(database_path()) == {'Uploaded'}
+    backup = database_path().parent / response.get_json()['backup_created']
+    assert team_names(backup) == {'Uploaded', 'Live only'}
+    assert {team.team_name for team in Team.query} == {'Uploaded'}
@@ -0,0 +1,46 @@
+from conftest import ADMIN
+
+from app.conditional import table_versions
+from app.models import db, Team, ProblemStatement
+from app.selection import select_statement, release_statement, recount_selections
+
+
+def statements_version():
+    return table_versions('problem_statements')['problem_statements'][0]
+
+
+def setup_statement():
+    statement = ProblemStatement(title='Sorting Hat', description='Sort', domain='gryffindor',
+                                 difficulty='easy', capacity=2)
+    team = Team(team_name='Lions', house='Gryffindor', team_size=1, utr_transaction_id='UTR',
+                approval_status='approved')
+    db.session.add_all([statement, team])
+    db.session.commit()
+    return statement.id, team.id
+
+
+def test_selection_bumps_the_statement_version(ctx):
+    statement_id, team_id = setup_statement()
+    before = statements_version()
+    select_statement(team_id, statement_id)
+    assert statements_version() > before
+
+    before = statements_version()
+    release_statement(statement_id)
+    db.session.commit()
+    assert statements_version() > before
+
+
+def test_recount_changes_the_etag(client):
+    setup_statement()
+    # Drift that only a recount repairs
+    statements = ProblemStatement.__table__
+    db.session.execute(statements.update().values(selected_count=2))
+    db.session.commit()
+
+    url = '/api/admin/problem-statements'
+    first = client.get(url, headers=ADMIN)
+    recount_selections()
+    second = client.get(url, headers={**ADMIN, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
@@ -0,0 +1,44 @@
+import io
+
+from app.config import Config
+from app.models import db, StoredFile
+from app.storage import store_stream, delete_stored
+
+
+def store(content=b'proof'):
+    return store_stream(io.BytesIO(content), 'proof.png', 'image/png')
+
+
+def test_rolled_back_upload_leaves_no_row(ctx):
+    StoredFile.query.count()  # Only a read before the savepoint, as in register_team
+    store()
+    db.session.rollback()
+    db.session.remove()
+    assert StoredFile.query.count() == 0
+
+
+def test_delete_removes_the_file_after_commit(ctx):
+    path = store().path
+    db.session.commit()
+    assert delete_stored(path)
+    assert Config.upload_path(path).exists()
+    db.session.commit()
+    assert not Config.upload_path(path).exists()
+    assert StoredFile.query.filter_by(path=path).count() == 0
+
+
+def test_rolled_back_delete_keeps_the_file(ctx):
+    path = store().path
+    db.session.commit()
+    delete_stored(path)
+    db.session.rollback()
+    assert Config.upload_path(path).exists()
+    assert StoredFile.query.filter_by(path=path).count() == 1
+
+
+def test_missing_file_is_written_again(ctx):
+    path = store().path
+    db.session.commit()
+    Config.upload_path(path).unlink()
+    assert store().path == path
+    assert Config.upload_path(path).read_bytes() == b'proof'
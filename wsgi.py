@@ -1,5 +1,11 @@
 """
 WSGI entry point for Gunicorn
+
+    gunicorn --preload wsgi:app
+
+The app is built once here; create_app has no side effects, so it can be
+built in the --preload master and shared with the workers. Run
+`flask --app wsgi init-db` once before the first start.
 """
 from app import create_app
 
@@ -10,5 +16,7 @@ application = create_app()
 app = application
 
 if __name__ == '__main__':
+    from app.cli import init_db
+    with application.app_context():
+        init_db()
     application.run(debug=True, host='0.0.0.0', port=5000)
-